@@ -4,6 +4,7 @@ AI Agents for Tenant Screening.
 All agents use Claude Sonnet 4.5 for AI-powered reasoning.
 """
 
+from .base_agent import BaseAgent
 from .base_ai_agent import BaseAIAgent
 from .ingestion_ai_agent import get_ingestion_agent
 from .identity_ai_agent import get_identity_agent
@@ -17,6 +18,7 @@ from .audit_agent import get_audit_agent
 __version__ = "1.0.0"
 
 __all__ = [
+    "BaseAgent",
     "BaseAIAgent",
     "get_ingestion_agent",
     "get_identity_agent",
@@ -4,16 +4,83 @@ Audit Agent.
 Non-AI agent for logging, governance, and audit trail generation.
 """
 
+import os
+import sys
+import asyncio
 import logging
 import json
-from typing import Dict, Any, List
+from collections import deque, defaultdict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Callable
 from datetime import datetime
-from .base_ai_agent import BaseAIAgent
+from .base_agent import BaseAgent, HAS_ORJSON
+from .audit_types import (
+    AgentLogRow,
+    AuditEntry,
+    BiasCheck,
+    ComplianceCheck,
+    Explainability,
+    FinalDecision,
+    ScreeningSummary,
+    encode_default
+)
+
+if HAS_ORJSON:
+    import orjson
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
 
 logger = logging.getLogger(__name__)
 
+# Audit persistence settings (entries are buffered and written in batches)
+AUDIT_LOG_PATH = os.getenv("AUDIT_LOG_PATH")
+AUDIT_LOG_FORMAT = os.getenv("AUDIT_LOG_FORMAT", "jsonl")  # jsonl | msgpack
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_BATCH_MS = int(os.getenv("AUDIT_BATCH_MS", "50"))
+AUDIT_MAX_IN_MEMORY = int(os.getenv("AUDIT_MAX_IN_MEMORY", "10000"))
+
+# Agent result keys in the screening context, in pipeline order
+_AGENT_KEYS = (
+    "ingestion_result",
+    "identity_result",
+    "fraud_result",
+    "risk_result",
+    "compliance_result",
+    "bias_result",
+    "decision_result"
+)
+
+# Static audit metadata, shared by every entry
+_DATA_SOURCES = (
+    "Applicant-provided information",
+    "Credit bureau data (mock)",
+    "Identity verification service",
+    "Fraud detection models",
+    "Risk scoring model (EBM)"
+)
 
-class AuditAgent(BaseAIAgent):
+_AI_MODELS_USED = (
+    "Claude Sonnet 4.5 (Decision, Identity, Fraud, Compliance, Bias)",
+    "EBM (Risk Scoring)",
+    "XGBoost (Fraud Detection)"
+)
+
+# Per-agent result summaries, keyed by agent name
+_SUMMARIZERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "IdentityAIAgent": lambda d: f"Status: {d.get('verification_status', 'UNKNOWN')}",
+    "RiskAIAgent": lambda d: f"Score: {d.get('risk_score', 0)}/1000, Tier: {d.get('risk_tier', 'UNKNOWN')}",
+    "DecisionAIAgent": lambda d: f"Decision: {d.get('decision', 'UNKNOWN')}, Confidence: {d.get('confidence', 0)}%",
+    "FraudDetectionAgent": lambda d: f"Risk: {d.get('fraud_risk_level', 'UNKNOWN')}",
+    "ComplianceAIAgent": lambda d: f"Status: {d.get('compliance_status', 'UNKNOWN')}",
+    "BiasAIAgent": lambda d: f"Bias: {'Detected' if d.get('bias_detected') else 'Not Detected'}"
+}
+
+
+class AuditAgent(BaseAgent):
     """
     Audit and logging agent.
     
@@ -23,13 +90,20 @@ class AuditAgent(BaseAIAgent):
     
     def __init__(self):
         """Initialize AuditAgent."""
-        super().__init__(
-            agent_name="AuditAgent",
-            model="none",  # Not using AI
-            max_tokens=0,
-            temperature=0
-        )
-        self.audit_log: List[Dict[str, Any]] = []
+        super().__init__(agent_name="AuditAgent")
+        # Bounded in-memory audit trail, indexed by application ID
+        self.audit_log: deque = deque(maxlen=AUDIT_MAX_IN_MEMORY)
+        self._by_app: Dict[str, List[AuditEntry]] = defaultdict(list)
+        self._audit_count = 0
+        
+        # Batched persistence (enabled when AUDIT_LOG_PATH is set)
+        self.log_path = AUDIT_LOG_PATH
+        self.log_format = AUDIT_LOG_FORMAT
+        if self.log_format == "msgpack" and not HAS_MSGPACK:
+            logger.warning("msgpack not available - writing audit log as JSON lines")
+            self.log_format = "jsonl"
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
     
     async def _run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -41,147 +115,252 @@ class AuditAgent(BaseAIAgent):
         Returns:
             Audit trail summary
         """
-        try:
-            application_id = context.get("application_id", "unknown")
-            
-            # Build comprehensive audit trail
-            audit_entry = {
-                "application_id": application_id,
-                "audit_timestamp": datetime.utcnow().isoformat(),
-                "screening_summary": self._build_summary(context),
-                "agent_executions": self._extract_agent_logs(context),
-                "compliance_check": self._extract_compliance(context),
-                "bias_check": self._extract_bias(context),
-                "final_decision": self._extract_decision(context),
-                "data_sources": self._list_data_sources(context),
-                "explainability": self._build_explainability(context)
-            }
-            
-            # Store audit log
-            self.audit_log.append(audit_entry)
-            
-            logger.info(f"Audit trail generated for {application_id}")
+        application_id = context.get("application_id", "unknown")
+        
+        # Single timestamp for the whole audit entry
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        now_date = now.date().isoformat()
+        
+        # Walk agent results once
+        logs, agents_executed, results = self._collect_agent_state(context, now_iso)
+        
+        # Resolve each agent's payload once
+        compliance = results["compliance_result"]
+        bias = results["bias_result"]
+        decision_data = results["decision_result"].get("data", {})
+        risk_data = results["risk_result"].get("data", {})
+        
+        # Build comprehensive audit trail
+        audit_entry = AuditEntry(
+            application_id=application_id,
+            audit_timestamp=now_iso,
+            screening_summary=self._build_summary(context, now_date, agents_executed),
+            agent_executions=logs,
+            compliance_check=self._extract_compliance(compliance, compliance.get("data", {})),
+            bias_check=self._extract_bias(bias, bias.get("data", {})),
+            final_decision=self._extract_decision(decision_data),
+            data_sources=self._list_data_sources(context),
+            explainability=self._build_explainability(decision_data, risk_data)
+        )
+        
+        # Store audit log
+        self._store(audit_entry)
+        self._enqueue(audit_entry)
+        
+        logger.info(f"Audit trail generated for {application_id}")
+        
+        return {
+            "audit_id": f"AUDIT-{self._audit_count}",
+            "audit_complete": True,
+            "records_created": len(audit_entry.agent_executions),
+            "compliance_verified": audit_entry.compliance_check.compliant,
+            "bias_checked": audit_entry.bias_check.checked,
+            "audit_summary": audit_entry.to_dict()
+        }
+    
+    def _store(self, audit_entry: AuditEntry) -> None:
+        """Append entry to in-memory log, evicting the oldest when full."""
+        if len(self.audit_log) == self.audit_log.maxlen:
+            evicted = self.audit_log[0]
+            app_id = evicted.application_id
+            entries = self._by_app.get(app_id)
+            if entries:
+                entries.pop(0)
+                if not entries:
+                    del self._by_app[app_id]
+        
+        self.audit_log.append(audit_entry)
+        self._by_app[audit_entry.application_id].append(audit_entry)
+        self._audit_count += 1
+    
+    def _enqueue(self, audit_entry: AuditEntry) -> None:
+        """Queue audit entry for batched persistence."""
+        if not self.log_path:
+            return
+        
+        # Flusher is bound to the running event loop, start it lazily
+        loop = asyncio.get_running_loop()
+        if (
+            self._flush_task is None
+            or self._flush_task.done()
+            or self._flush_task.get_loop() is not loop
+        ):
+            self._queue = asyncio.Queue()
+            self._flush_task = loop.create_task(self._flush_loop())
+        
+        self._queue.put_nowait(audit_entry)
+    
+    async def _flush_loop(self) -> None:
+        """Coalesce queued entries into batches and write each batch once."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + AUDIT_BATCH_MS / 1000
             
-            return {
-                "audit_id": f"AUDIT-{len(self.audit_log)}",
-                "audit_complete": True,
-                "records_created": len(audit_entry["agent_executions"]),
-                "compliance_verified": audit_entry["compliance_check"]["compliant"],
-                "bias_checked": audit_entry["bias_check"]["checked"],
-                "audit_summary": audit_entry
-            }
+            # Collect up to AUDIT_BATCH_SIZE entries or until the window closes
+            while len(batch) < AUDIT_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
             
-        except Exception as e:
-            logger.error(f"Audit agent error: {str(e)}", exc_info=True)
-            raise
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(batch)} audit entries: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _write_batch(self, batch: List[AuditEntry]) -> None:
+        """Serialize a batch and append it with a single write."""
+        if self.log_format == "msgpack":
+            # Concatenated MessagePack objects, readable with msgpack.Unpacker
+            payload = b"".join(
+                msgpack.packb(entry.to_dict(), use_bin_type=True, default=str)
+                for entry in batch
+            )
+        elif HAS_ORJSON:
+            # orjson serializes slotted dataclasses natively
+            payload = b"".join(
+                orjson.dumps(entry, default=str, option=orjson.OPT_APPEND_NEWLINE)
+                for entry in batch
+            )
+        else:
+            payload = "".join(
+                json.dumps(entry, default=encode_default) + "\n" for entry in batch
+            ).encode("utf-8")
+        await asyncio.to_thread(self._append_to_log, payload)
+        logger.debug(f"Flushed {len(batch)} audit entries to {self.log_path}")
+    
+    def _append_to_log(self, payload: bytes) -> None:
+        """Append payload to audit log file and sync to disk."""
+        with open(self.log_path, "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    async def flush(self) -> None:
+        """
+        Wait until all queued audit entries have been persisted.
+        
+        Call on shutdown so buffered entries are not lost.
+        """
+        if self._queue is None or self._flush_task is None or self._flush_task.done():
+            return
+        if self._flush_task.get_loop() is not asyncio.get_running_loop():
+            return
+        await self._queue.join()
     
-    def _build_summary(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_summary(
+        self,
+        context: Dict[str, Any],
+        now_date: str,
+        agents_executed: int
+    ) -> ScreeningSummary:
         """Build screening summary."""
-        return {
-            "application_id": context.get("application_id"),
-            "applicant_name": self._get_applicant_name(context),
-            "screening_date": datetime.utcnow().date().isoformat(),
-            "total_agents_executed": self._count_agents(context),
-            "screening_duration_ms": context.get("total_execution_time_ms", 0)
-        }
+        return ScreeningSummary(
+            application_id=context.get("application_id"),
+            applicant_name=self._get_applicant_name(context),
+            screening_date=now_date,
+            total_agents_executed=agents_executed,
+            screening_duration_ms=context.get("total_execution_time_ms", 0)
+        )
     
-    def _extract_agent_logs(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Extract execution logs from all agents."""
-        agents = [
-            "ingestion_result",
-            "identity_result",
-            "fraud_result",
-            "risk_result",
-            "compliance_result",
-            "bias_result",
-            "decision_result"
-        ]
+    def _collect_agent_state(
+        self,
+        context: Dict[str, Any],
+        now_iso: str
+    ) -> Tuple[Tuple[AgentLogRow, ...], int, Dict[str, Dict[str, Any]]]:
+        """
+        Collect execution logs, success count and results in a single pass.
+        
+        Args:
+            context: Full screening context
+            now_iso: Audit timestamp
         
+        Returns:
+            Tuple of (agent logs, successful agent count, results by context key)
+        """
         logs = []
-        for agent_key in agents:
-            result = context.get(agent_key)
+        agents_executed = 0
+        results = {}
+        
+        for agent_key in _AGENT_KEYS:
+            result = context.get(agent_key) or {}
+            results[agent_key] = result
             if result:
-                logs.append({
-                    "agent_name": result.get("agent", agent_key),
-                    "status": result.get("status", "unknown"),
-                    "execution_time_ms": result.get("execution_time_ms", 0),
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "result_summary": self._summarize_result(result)
-                })
+                if result.get("status") == "success":
+                    agents_executed += 1
+                # Agent names and statuses repeat across every audit entry
+                logs.append(AgentLogRow(
+                    agent_name=sys.intern(result.get("agent", agent_key)),
+                    status=sys.intern(result.get("status", "unknown")),
+                    execution_time_ms=result.get("execution_time_ms", 0),
+                    timestamp=now_iso,
+                    result_summary=self._summarize_result(result)
+                ))
         
-        return logs
+        return tuple(logs), agents_executed, results
     
-    def _extract_compliance(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    def _extract_compliance(
+        self,
+        compliance: Dict[str, Any],
+        compliance_data: Dict[str, Any]
+    ) -> ComplianceCheck:
         """Extract compliance check results."""
-        compliance = context.get("compliance_result", {})
-        compliance_data = compliance.get("data", {})
-        
-        return {
-            "checked": compliance.get("status") == "success",
-            "compliant": compliance_data.get("compliance_status") == "COMPLIANT",
-            "fcra_compliant": compliance_data.get("fcra_compliant", False),
-            "fair_housing_compliant": compliance_data.get("fair_housing_compliant", False),
-            "violations": compliance_data.get("violations", [])
-        }
+        return ComplianceCheck(
+            checked=compliance.get("status") == "success",
+            compliant=compliance_data.get("compliance_status") == "COMPLIANT",
+            fcra_compliant=compliance_data.get("fcra_compliant", False),
+            fair_housing_compliant=compliance_data.get("fair_housing_compliant", False),
+            violations=compliance_data.get("violations", [])
+        )
     
-    def _extract_bias(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    def _extract_bias(self, bias: Dict[str, Any], bias_data: Dict[str, Any]) -> BiasCheck:
         """Extract bias check results."""
-        bias = context.get("bias_result", {})
-        bias_data = bias.get("data", {})
-        
-        return {
-            "checked": bias.get("status") == "success",
-            "bias_detected": bias_data.get("bias_detected", False),
-            "fairness_score": bias_data.get("fairness_score", 1.0),
-            "bias_indicators": bias_data.get("bias_indicators", []),
-            "risk_level": bias_data.get("risk_level", "UNKNOWN")
-        }
+        return BiasCheck(
+            checked=bias.get("status") == "success",
+            bias_detected=bias_data.get("bias_detected", False),
+            fairness_score=bias_data.get("fairness_score", 1.0),
+            bias_indicators=bias_data.get("bias_indicators", []),
+            risk_level=bias_data.get("risk_level", "UNKNOWN")
+        )
     
-    def _extract_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    def _extract_decision(self, decision_data: Dict[str, Any]) -> FinalDecision:
         """Extract final decision."""
-        decision = context.get("decision_result", {})
-        decision_data = decision.get("data", {})
-        
-        return {
-            "decision": decision_data.get("decision", "UNKNOWN"),
-            "confidence": decision_data.get("confidence", 0),
-            "key_factors": decision_data.get("key_factors", []),
-            "reasoning": decision_data.get("reasoning", ""),
-            "conditions": decision_data.get("conditions")
-        }
+        return FinalDecision(
+            decision=decision_data.get("decision", "UNKNOWN"),
+            confidence=decision_data.get("confidence", 0),
+            key_factors=decision_data.get("key_factors", []),
+            reasoning=decision_data.get("reasoning", ""),
+            conditions=decision_data.get("conditions")
+        )
     
-    def _list_data_sources(self, context: Dict[str, Any]) -> List[str]:
+    def _list_data_sources(self, context: Dict[str, Any]) -> Tuple[str, ...]:
         """List all data sources used."""
-        sources = [
-            "Applicant-provided information",
-            "Credit bureau data (mock)",
-            "Identity verification service",
-            "Fraud detection models",
-            "Risk scoring model (EBM)"
-        ]
-        return sources
-    
-    def _build_explainability(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        return _DATA_SOURCES
+    
+    def _build_explainability(
+        self,
+        decision_data: Dict[str, Any],
+        risk_data: Dict[str, Any]
+    ) -> Explainability:
         """Build explainability summary for transparency."""
-        decision = context.get("decision_result", {})
-        decision_data = decision.get("data", {})
-        
-        risk = context.get("risk_result", {})
-        risk_data = risk.get("data", {})
-        
-        return {
-            "decision_factors": decision_data.get("key_factors", []),
-            "risk_drivers": risk_data.get("key_risk_drivers", []),
-            "credit_score": risk_data.get("credit_score", 0),
-            "risk_score": risk_data.get("risk_score", 0),
-            "ai_models_used": [
-                "Claude Sonnet 4.5 (Decision, Identity, Fraud, Compliance, Bias)",
-                "EBM (Risk Scoring)",
-                "XGBoost (Fraud Detection)"
-            ],
-            "decision_rationale": decision_data.get("reasoning", ""),
-            "adverse_action_required": decision_data.get("decision") in ["DENY", "CONDITIONAL_APPROVE"]
-        }
+        return Explainability(
+            decision_factors=decision_data.get("key_factors", []),
+            risk_drivers=risk_data.get("key_risk_drivers", []),
+            credit_score=risk_data.get("credit_score", 0),
+            risk_score=risk_data.get("risk_score", 0),
+            ai_models_used=_AI_MODELS_USED,
+            decision_rationale=decision_data.get("reasoning", ""),
+            adverse_action_required=decision_data.get("decision") in ["DENY", "CONDITIONAL_APPROVE"]
+        )
     
     def _get_applicant_name(self, context: Dict[str, Any]) -> str:
         """Get applicant name."""
@@ -190,35 +369,15 @@ class AuditAgent(BaseAIAgent):
         last = applicant.get("last_name", "")
         return f"{first} {last}".strip() or "Unknown"
     
-    def _count_agents(self, context: Dict[str, Any]) -> int:
-        """Count executed agents."""
-        agent_keys = [
-            "ingestion_result", "identity_result", "fraud_result",
-            "risk_result", "compliance_result", "bias_result", "decision_result"
-        ]
-        return sum(1 for key in agent_keys if context.get(key, {}).get("status") == "success")
-    
     def _summarize_result(self, result: Dict[str, Any]) -> str:
         """Create brief summary of agent result."""
         if result.get("status") == "error":
             return f"Error: {result.get('error', 'Unknown error')}"
         
-        data = result.get("data", {})
-        agent = result.get("agent", "Unknown")
-        
         # Agent-specific summaries
-        if "Identity" in agent:
-            return f"Status: {data.get('verification_status', 'UNKNOWN')}"
-        elif "Risk" in agent:
-            return f"Score: {data.get('risk_score', 0)}/1000, Tier: {data.get('risk_tier', 'UNKNOWN')}"
-        elif "Decision" in agent:
-            return f"Decision: {data.get('decision', 'UNKNOWN')}, Confidence: {data.get('confidence', 0)}%"
-        elif "Fraud" in agent:
-            return f"Risk: {data.get('fraud_risk_level', 'UNKNOWN')}"
-        elif "Compliance" in agent:
-            return f"Status: {data.get('compliance_status', 'UNKNOWN')}"
-        elif "Bias" in agent:
-            return f"Bias: {'Detected' if data.get('bias_detected') else 'Not Detected'}"
+        summarize = _SUMMARIZERS.get(result.get("agent"))
+        if summarize:
+            return summarize(result.get("data", {}))
         
         return "Completed successfully"
     
@@ -233,18 +392,16 @@ class AuditAgent(BaseAIAgent):
             List of audit log entries
         """
         if application_id:
-            return [
-                log for log in self.audit_log
-                if log.get("application_id") == application_id
-            ]
-        return self.audit_log
+            return [entry.to_dict() for entry in self._by_app.get(application_id, [])]
+        return [entry.to_dict() for entry in self.audit_log]
 
 
+@lru_cache(maxsize=1)
 def get_audit_agent() -> AuditAgent:
     """
-    Factory function to get AuditAgent instance.
+    Factory function to get the shared AuditAgent instance.
     
     Returns:
-        Initialized AuditAgent
+        Initialized AuditAgent (created on first call)
     """
     return AuditAgent()
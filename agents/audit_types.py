@@ -0,0 +1,96 @@
+"""
+Audit Types.
+
+Compact record types for audit trail entries. Slotted dataclasses keep
+long-lived audit entries small; dicts are only built at the API boundary.
+"""
+
+from dataclasses import dataclass, asdict, is_dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+
+@dataclass(slots=True, frozen=True)
+class AgentLogRow:
+    """Execution record for a single agent."""
+    agent_name: str
+    status: str
+    execution_time_ms: int
+    timestamp: str
+    result_summary: str
+
+
+@dataclass(slots=True, frozen=True)
+class ScreeningSummary:
+    """High-level screening summary."""
+    application_id: Optional[str]
+    applicant_name: str
+    screening_date: str
+    total_agents_executed: int
+    screening_duration_ms: int
+
+
+@dataclass(slots=True, frozen=True)
+class ComplianceCheck:
+    """Compliance agent outcome."""
+    checked: bool
+    compliant: bool
+    fcra_compliant: bool
+    fair_housing_compliant: bool
+    violations: List[str]
+
+
+@dataclass(slots=True, frozen=True)
+class BiasCheck:
+    """Bias agent outcome."""
+    checked: bool
+    bias_detected: bool
+    fairness_score: float
+    bias_indicators: List[str]
+    risk_level: str
+
+
+@dataclass(slots=True, frozen=True)
+class FinalDecision:
+    """Decision agent outcome."""
+    decision: str
+    confidence: Any
+    key_factors: List[str]
+    reasoning: str
+    conditions: Optional[List[str]]
+
+
+@dataclass(slots=True, frozen=True)
+class Explainability:
+    """Explainability summary for transparency."""
+    decision_factors: List[str]
+    risk_drivers: List[str]
+    credit_score: Any
+    risk_score: Any
+    ai_models_used: Tuple[str, ...]
+    decision_rationale: str
+    adverse_action_required: bool
+
+
+@dataclass(slots=True, frozen=True)
+class AuditEntry:
+    """Complete audit trail entry for one screening."""
+    application_id: str
+    audit_timestamp: str
+    screening_summary: ScreeningSummary
+    agent_executions: Tuple[AgentLogRow, ...]
+    compliance_check: ComplianceCheck
+    bias_check: BiasCheck
+    final_decision: FinalDecision
+    data_sources: Tuple[str, ...]
+    explainability: Explainability
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize as nested dicts (for API responses and stdlib json)."""
+        return asdict(self)
+
+
+def encode_default(obj: Any) -> Any:
+    """Serializer hook for encoders without native dataclass support."""
+    if is_dataclass(obj):
+        return asdict(obj)
+    return str(obj)
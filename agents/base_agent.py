@@ -0,0 +1,177 @@
+"""
+Base Agent.
+
+Minimal foundation shared by all agents, AI-powered or not.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Sequence
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+class BaseAgent(ABC):
+    """
+    Base class for all agents.
+    
+    Provides common functionality:
+    - Logging and error handling
+    - Input/output standardization
+    - Performance metrics
+    """
+    
+    def __init__(self, agent_name: str):
+        """
+        Initialize agent.
+        
+        Args:
+            agent_name: Unique agent identifier
+        """
+        self.agent_name = agent_name
+        self.logger = logging.getLogger(f"agents.{agent_name}")
+        
+        # Non-AI agents report no model; BaseAIAgent overrides these
+        self.model = "none"
+        self.has_llm = False
+        self.llm_provider = "none"
+    
+    async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute the agent.
+        
+        Args:
+            input_data: Input context from orchestrator
+            
+        Returns:
+            Agent result with status and data
+        """
+        start_ns = time.perf_counter_ns()
+        
+        self.logger.info(f"{self.agent_name}: Starting execution")
+        
+        try:
+            # Validate input
+            self._validate_input(input_data)
+            
+            # Run agent logic
+            result = await self._run(input_data)
+            
+            # Calculate execution time (monotonic clock, wall clock only for the timestamp)
+            execution_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            # Wrap result
+            return {
+                "status": "success",
+                "agent": self.agent_name,
+                "data": result,
+                "metadata": {
+                    "execution_time_ms": execution_time_ms,
+                    "model_used": self.model if self.has_llm else "fallback",
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+            }
+            
+        except Exception as e:
+            self.logger.error(f"{self.agent_name}: Execution failed: {e}", exc_info=True)
+            return self._execution_error(e)
+    
+    def _execution_error(self, error: Exception) -> Dict[str, Any]:
+        """Build the execute() envelope for a failed run."""
+        return {
+            "status": "error",
+            "agent": self.agent_name,
+            "error": str(error),
+            "error_type": type(error).__name__,
+            "metadata": {
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        }
+    
+    @classmethod
+    async def execute_many(
+        cls,
+        agents: Sequence["BaseAgent"],
+        input_data: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute independent agents concurrently on the same input.
+        
+        Wall time is the slowest agent rather than the sum. input_data is
+        shared, not copied: agents must treat it as read-only during the
+        fan-out, and callers merge results into it afterwards.
+        
+        Args:
+            agents: Agents with no dependencies on each other
+            input_data: Input context shared by all agents
+            
+        Returns:
+            Result envelopes in the same order as agents
+        """
+        results = await asyncio.gather(
+            *(agent.execute(input_data) for agent in agents),
+            return_exceptions=True
+        )
+        
+        envelopes = []
+        for agent, result in zip(agents, results):
+            if isinstance(result, Exception):
+                agent.logger.error(f"{agent.agent_name}: Execution failed: {result}")
+                result = agent._execution_error(result)
+            elif isinstance(result, BaseException):
+                raise result
+            envelopes.append(result)
+        return envelopes
+    
+    @abstractmethod
+    async def _run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Agent-specific logic implementation.
+        
+        Must be implemented by subclasses.
+        
+        Args:
+            input_data: Validated input data
+            
+        Returns:
+            Agent-specific result
+        """
+        pass
+    
+    def _validate_input(self, input_data: Dict[str, Any]) -> None:
+        """
+        Validate input data.
+        
+        Override in subclasses for specific validation.
+        
+        Args:
+            input_data: Input to validate
+            
+        Raises:
+            ValueError: If validation fails
+        """
+        if not input_data:
+            raise ValueError("Input data is required")
+    
+    def _create_success_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create standardized success response."""
+        return {"status": "success", "data": data}
+    
+    def _create_error_response(
+        self,
+        error_message: str,
+        error_code: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create standardized error response."""
+        return {
+            "status": "error",
+            "error": error_message,
+            "error_code": error_code
+        }
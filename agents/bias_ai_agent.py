@@ -5,11 +5,33 @@ AI-powered fairness checking to detect and mitigate algorithmic bias.
 """
 
 import logging
+from functools import lru_cache
 from typing import Dict, Any
 from .base_ai_agent import BaseAIAgent
+from .keyword_scan import KeywordScanner
+from .result_models import BiasResult, parse_result
 
 logger = logging.getLogger(__name__)
 
+# Keywords checked by _manual_parse_bias, all found in a single pass over the text
+_BIAS_KEYWORDS = (
+    "BIAS DETECTED",
+    "DISPARATE",
+    "DISCRIMINAT",
+    "UNFAIR",
+    "BIAS",
+    "INCOME",
+    "CREDIT",
+    "ZIP",
+    "GEOGRAPHIC"
+)
+
+_BIAS_SCANNER = KeywordScanner(_BIAS_KEYWORDS)
+
+# Static parts of the bias detection prompt
+_BIAS_PROMPT_HEADER = "# Bias Detection Request\n\nAnalyze this screening for potential bias:\n\n"
+_BIAS_PROMPT_FOOTER = "\n**Analyze these factors for potential bias against protected classes.**"
+
 
 class BiasAIAgent(BaseAIAgent):
     """
@@ -19,23 +41,8 @@ class BiasAIAgent(BaseAIAgent):
     against protected classes, ensuring algorithmic fairness.
     """
     
-    def __init__(self):
-        """Initialize BiasAIAgent."""
-        super().__init__(
-            agent_name="BiasAIAgent",
-            model="gemini-2.5-flash",
-            max_tokens=2500,
-            temperature=0.2
-        )
-    
-    def _get_system_prompt(self) -> str:
-        """
-        System prompt for bias detection.
-        
-        Returns:
-            Specialized prompt for fairness analysis
-        """
-        return """You are an AI fairness expert for Equifax, specializing in detecting algorithmic bias.
+    # Static fairness framework, sent as the model's system instruction
+    _SYSTEM_PROMPT = """You are an AI fairness expert for Equifax, specializing in detecting algorithmic bias.
 
 Your role is to analyze tenant screening decisions for potential bias against protected classes.
 
@@ -99,6 +106,44 @@ Your role is to analyze tenant screening decisions for potential bias against pr
 }
 
 Be vigilant - flag anything that could indicate bias."""
+
+    # Mirrors the output format in the system prompt
+    _response_schema = {
+        "type": "object",
+        "properties": {
+            "bias_detected": {"type": "boolean"},
+            "fairness_score": {"type": "number"},
+            "bias_indicators": {"type": "array", "items": {"type": "string"}},
+            "protected_classes_affected": {"type": "array", "items": {"type": "string"}},
+            "bias_type": {
+                "type": "string",
+                "enum": ["DISPARATE_TREATMENT", "DISPARATE_IMPACT", "PROXY_DISCRIMINATION", "NONE"]
+            },
+            "risk_level": {"type": "string", "enum": ["LOW", "MODERATE", "HIGH", "CRITICAL"]},
+            "mitigation_strategies": {"type": "array", "items": {"type": "string"}},
+            "recommendation": {"type": "string"}
+        },
+        "required": ["bias_detected", "fairness_score", "bias_indicators", "risk_level", "recommendation"]
+    }
+    
+    def __init__(self):
+        """Initialize BiasAIAgent."""
+        super().__init__(
+            agent_name="BiasAIAgent",
+            model="gemini-2.5-flash",
+            max_tokens=2500,
+            temperature=0.2,
+            service_tier="flex"  # Post-decision check, tolerates queueing
+        )
+    
+    def _get_system_prompt(self) -> str:
+        """
+        System prompt for bias detection.
+        
+        Returns:
+            Specialized prompt for fairness analysis
+        """
+        return self._SYSTEM_PROMPT
     
     async def _run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -120,7 +165,7 @@ Be vigilant - flag anything that could indicate bias."""
             user_prompt = self._build_bias_prompt(decision, risk, applicant)
             
             # Call Claude for bias analysis
-            bias_raw = await self.call_llm(user_prompt)
+            bias_raw = await self.call_llm(user_prompt, response_schema=self._response_schema)
             
             # Parse and validate
             bias = self._parse_bias(bias_raw)
@@ -132,7 +177,7 @@ Be vigilant - flag anything that could indicate bias."""
             )
             
             return bias
-            
+        
         except Exception as e:
             logger.error(f"Bias detection error: {str(e)}", exc_info=True)
             raise
@@ -154,49 +199,34 @@ Be vigilant - flag anything that could indicate bias."""
         Returns:
             Formatted prompt for Claude
         """
-        prompt = "# Bias Detection Request\n\nAnalyze this screening for potential bias:\n\n"
-        
-        # Decision details
         decision_data = decision.get("data", {})
-        prompt += f"## Decision Made\n"
-        prompt += f"- Decision: {decision_data.get('decision', 'UNKNOWN')}\n"
-        prompt += f"- Confidence: {decision_data.get('confidence', 0)}%\n"
-        prompt += f"- Key Factors: {', '.join(decision_data.get('key_factors', []))}\n\n"
-        
-        # Check for potentially biased factors
-        prompt += f"## Factors to Review for Bias\n"
-        
-        # Income requirements
-        income = applicant.get("employment", {}).get("annual_income", 0)
-        prompt += f"- Income: ${income:,.0f} (check if requirement is disproportionate)\n"
-        
-        # Credit score
         risk_data = risk.get("data", {})
-        credit_score = risk_data.get("credit_score", 0)
-        prompt += f"- Credit Score: {credit_score} (credit scores can have disparate impact)\n"
-        
-        # Address (potential proxy for race)
+        employment = applicant.get("employment", {})
         address = applicant.get("current_address", {})
-        prompt += f"- ZIP Code: {address.get('zip', 'N/A')} (geographic proxies for protected classes)\n"
-        
-        # Employment type
-        emp_status = applicant.get("employment", {}).get("employment_status", "N/A")
-        prompt += f"- Employment Type: {emp_status} (check if gig workers disadvantaged)\n"
-        
-        # Rental history
         rental_history = applicant.get("rental_history", {})
-        years_at_current = rental_history.get("years_at_current", 0)
-        prompt += f"- Rental Stability: {years_at_current:.1f} years (may disadvantage younger applicants)\n\n"
         
-        # Risk drivers
-        prompt += f"## Risk Assessment Drivers\n"
-        risk_drivers = risk_data.get("key_risk_drivers", [])
-        for driver in risk_drivers:
-            prompt += f"- {driver}\n"
+        parts = [
+            _BIAS_PROMPT_HEADER,
+            # Decision details
+            "## Decision Made\n",
+            f"- Decision: {decision_data.get('decision', 'UNKNOWN')}\n",
+            f"- Confidence: {decision_data.get('confidence', 0)}%\n",
+            f"- Key Factors: {', '.join(decision_data.get('key_factors', []))}\n\n",
+            # Check for potentially biased factors
+            "## Factors to Review for Bias\n",
+            f"- Income: ${employment.get('annual_income', 0):,.0f} (check if requirement is disproportionate)\n",
+            f"- Credit Score: {risk_data.get('credit_score', 0)} (credit scores can have disparate impact)\n",
+            # Address (potential proxy for race)
+            f"- ZIP Code: {address.get('zip', 'N/A')} (geographic proxies for protected classes)\n",
+            f"- Employment Type: {employment.get('employment_status', 'N/A')} (check if gig workers disadvantaged)\n",
+            f"- Rental Stability: {rental_history.get('years_at_current', 0):.1f} years (may disadvantage younger applicants)\n\n",
+            # Risk drivers
+            "## Risk Assessment Drivers\n"
+        ]
+        parts.extend(f"- {driver}\n" for driver in risk_data.get("key_risk_drivers", []))
+        parts.append(_BIAS_PROMPT_FOOTER)
         
-        prompt += f"\n**Analyze these factors for potential bias against protected classes.**"
-        
-        return prompt
+        return "".join(parts)
     
     def _parse_bias(self, raw_response: str) -> Dict[str, Any]:
         """
@@ -208,25 +238,13 @@ Be vigilant - flag anything that could indicate bias."""
         Returns:
             Structured bias analysis
         """
-        import json
+        # Validate JSON against the result model
+        bias = parse_result(BiasResult, raw_response)
+        if bias is not None:
+            return bias
         
-        try:
-            # Extract JSON
-            start = raw_response.find("{")
-            end = raw_response.rfind("}") + 1
-            
-            if start >= 0 and end > start:
-                json_str = raw_response[start:end]
-                bias = json.loads(json_str)
-                
-                if "bias_detected" in bias:
-                    return bias
-            
-            # Fallback parsing
-            return self._manual_parse_bias(raw_response)
-            
-        except json.JSONDecodeError:
-            return self._manual_parse_bias(raw_response)
+        # Fallback parsing
+        return self._manual_parse_bias(raw_response)
     
     def _manual_parse_bias(self, text: str) -> Dict[str, Any]:
         """
@@ -238,15 +256,10 @@ Be vigilant - flag anything that could indicate bias."""
         Returns:
             Best-effort bias structure
         """
-        text_upper = text.upper()
+        hits = _BIAS_SCANNER.find(text)
         
         # Determine if bias detected
-        bias_detected = any(keyword in text_upper for keyword in [
-            "BIAS DETECTED",
-            "DISPARATE",
-            "DISCRIMINAT",
-            "UNFAIR"
-        ])
+        bias_detected = not hits.isdisjoint(("BIAS DETECTED", "DISPARATE", "DISCRIMINAT", "UNFAIR"))
         
         # Fairness score
         if bias_detected:
@@ -258,11 +271,11 @@ Be vigilant - flag anything that could indicate bias."""
         
         # Look for specific indicators
         indicators = []
-        if "INCOME" in text_upper and "BIAS" in text_upper:
+        if "INCOME" in hits and "BIAS" in hits:
             indicators.append("Income requirement may have disparate impact")
-        if "CREDIT" in text_upper and "DISPARATE" in text_upper:
+        if "CREDIT" in hits and "DISPARATE" in hits:
             indicators.append("Credit score requirement affects protected classes")
-        if "ZIP" in text_upper or "GEOGRAPHIC" in text_upper:
+        if "ZIP" in hits or "GEOGRAPHIC" in hits:
             indicators.append("Geographic proxy for race detected")
         
         return {
@@ -280,11 +293,12 @@ Be vigilant - flag anything that could indicate bias."""
         }
 
 
+@lru_cache(maxsize=1)
 def get_bias_agent() -> BiasAIAgent:
     """
-    Factory function to get BiasAIAgent instance.
+    Factory function to get the shared BiasAIAgent instance.
     
     Returns:
-        Initialized BiasAIAgent
+        Initialized BiasAIAgent (created on first call)
     """
     return BiasAIAgent()
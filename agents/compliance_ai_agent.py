@@ -4,12 +4,73 @@ Compliance AI Agent.
 AI-powered compliance checking for FCRA, Fair Housing Act, and state regulations.
 """
 
+import os
+import asyncio
 import logging
-from typing import Dict, Any
+from functools import lru_cache
+from string import Template
+from typing import Dict, Any, Optional
 from .base_ai_agent import BaseAIAgent
+from .compliance_classifier import (
+    COMPLIANCE_CLASSIFIER_MIN_CONFIDENCE,
+    COMPLIANCE_CLASSIFIER_PATH,
+    compliance_classifier
+)
+from .keyword_scan import KeywordScanner
+from .llm_cache import ResponseCache
+from .result_models import ComplianceResult, parse_result
 
 logger = logging.getLogger(__name__)
 
+# Parsed compliance results kept for byte-identical prompts, expiring so
+# cached reviews do not outlive changes to the regulations or the model
+COMPLIANCE_CACHE_TTL_SECONDS = int(os.getenv("COMPLIANCE_CACHE_TTL_SECONDS", str(24 * 3600)))
+_PARSED_CACHE_MAX_ENTRIES = 1024
+
+# Approvals that clearly meet the screening criteria skip the LLM review
+COMPLIANCE_FAST_PATH = os.getenv("COMPLIANCE_FAST_PATH", "true").lower() == "true"
+_MIN_CREDIT_SCORE = 580
+_MIN_INCOME_TO_RENT = 2.5
+
+# Compliance review prompt; applicant summary carries no protected class info
+_PROMPT_TEMPLATE = Template(
+    "# Compliance Review Request\n\n"
+    "Review this screening decision for compliance:\n\n"
+    "## Applicant Profile\n"
+    "- Annual Income: $$${annual_income}\n"
+    "- Employment: ${employment_status}\n"
+    "- Rental History: ${rental_years} years\n\n"
+    "## Screening Decision\n"
+    "- Decision: ${decision}\n"
+    "- Confidence: ${confidence}%\n"
+    "- Reasoning: ${reasoning}\n"
+    "- Key Factors: ${key_factors}\n\n"
+    "## Risk Assessment\n"
+    "- Risk Score: ${risk_score}/1000\n"
+    "- Credit Score: ${credit_score}\n"
+    "- Risk Tier: ${risk_tier}\n\n"
+    "## Screening Criteria Applied\n"
+    "- Credit score threshold: 580+ (FCRA compliant)\n"
+    "- Income requirement: 2.5x monthly rent\n"
+    "- No criminal history consideration (compliant with 'Ban the Box')\n"
+    "- Fraud detection (permissible purpose)\n\n"
+    "**Check compliance using the regulatory framework provided.**"
+)
+
+# Keywords checked by _manual_parse_compliance, all found in a single pass over the text
+_COMPLIANCE_SCANNER = KeywordScanner((
+    "VIOLATION",
+    "COMPLIANT",
+    "FCRA",
+    "FAIR HOUSING",
+    "PASS",
+    "DISCRIMINAT",
+    "ADVERSE ACTION",
+    "MISSING",
+    "DENY",
+    "CONDITIONAL"
+))
+
 
 class ComplianceAIAgent(BaseAIAgent):
     """
@@ -19,23 +80,11 @@ class ComplianceAIAgent(BaseAIAgent):
     to ensure screening decisions are compliant.
     """
     
-    def __init__(self):
-        """Initialize ComplianceAIAgent."""
-        super().__init__(
-            agent_name="ComplianceAIAgent",
-            model="gemini-2.5-flash",
-            max_tokens=3000,
-            temperature=0.1  # Very low temperature for compliance accuracy
-        )
+    # Compliance answers are only reused for near-identical screenings
+    _semantic_threshold = 0.95
     
-    def _get_system_prompt(self) -> str:
-        """
-        System prompt for compliance checking.
-        
-        Returns:
-            Specialized prompt for regulatory compliance
-        """
-        return """You are an expert compliance agent for Equifax, specializing in tenant screening regulations.
+    # Static, so Gemini sees a byte-identical system_instruction prefix every call
+    _SYSTEM_PROMPT = """You are an expert compliance agent for Equifax, specializing in tenant screening regulations.
 
 Your role is to ensure all screening decisions comply with federal and state laws.
 
@@ -99,6 +148,31 @@ Your role is to ensure all screening decisions comply with federal and state law
 }
 
 Be thorough and conservative - flag anything questionable."""
+
+    def __init__(self):
+        """Initialize ComplianceAIAgent."""
+        super().__init__(
+            agent_name="ComplianceAIAgent",
+            model="gemini-2.5-flash",
+            max_tokens=3000,
+            temperature=0.1  # Very low temperature for compliance accuracy
+        )
+        
+        # Prompt digest -> parsed result; skips the LLM call, its cache
+        # lookups and parsing when a batch repeats a screening verbatim
+        self._parsed_cache = ResponseCache(
+            max_entries=_PARSED_CACHE_MAX_ENTRIES,
+            ttl_seconds=COMPLIANCE_CACHE_TTL_SECONDS
+        )
+    
+    def _get_system_prompt(self) -> str:
+        """
+        System prompt for compliance checking.
+        
+        Returns:
+            Specialized prompt for regulatory compliance
+        """
+        return self._SYSTEM_PROMPT
     
     async def _run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -116,14 +190,27 @@ Be thorough and conservative - flag anything questionable."""
             decision = context.get("decision_result", {})
             risk = context.get("risk_result", {})
             
+            if COMPLIANCE_FAST_PATH and self._is_trivially_compliant(context):
+                logger.info("Compliance check: COMPLIANT (rule-based, approval meets all criteria)")
+                return self._rule_based_compliant()
+            
             # Build compliance check prompt
             user_prompt = self._build_compliance_prompt(applicant, decision, risk)
             
-            # Call Claude for compliance analysis
-            compliance_raw = await self.call_llm(user_prompt)
+            # Local classifier settles confident all-clear reviews
+            if COMPLIANCE_CLASSIFIER_PATH:
+                compliance = await self._classify(user_prompt)
+                if compliance is not None:
+                    logger.info("Compliance check: COMPLIANT (classifier)")
+                    return compliance
             
-            # Parse and validate
-            compliance = self._parse_compliance(compliance_raw)
+            compliance, cache_hit = await self._cached_parse(
+                self._parsed_cache,
+                user_prompt,
+                lambda: self._request_compliance(user_prompt)
+            )
+            if cache_hit:
+                logger.info("Compliance check served from parsed result cache")
             
             # Log compliance status
             logger.info(
@@ -133,11 +220,125 @@ Be thorough and conservative - flag anything questionable."""
             )
             
             return compliance
-            
+        
         except Exception as e:
             logger.error(f"Compliance check error: {str(e)}", exc_info=True)
             raise
     
+    async def _request_compliance(self, user_prompt: str) -> Dict[str, Any]:
+        """
+        Ask Gemini for a compliance review and parse it.
+        
+        Args:
+            user_prompt: Compliance review prompt
+        
+        Returns:
+            Parsed compliance results
+        """
+        # Streamed, so generation stops at the end of the JSON verdict
+        compliance_raw = await self.call_llm(
+            user_prompt,
+            semantic_threshold=self._semantic_threshold,
+            stop_after_json=True
+        )
+        return self._parse_compliance(compliance_raw)
+    
+    def _is_trivially_compliant(self, context: Dict[str, Any]) -> bool:
+        """
+        Whether an approval meets every screening criterion outright.
+        
+        Only clean approvals qualify: APPROVE with no fair housing flag,
+        credit score 580+, income at least 2.5x rent and low fraud risk.
+        Denials, conditional approvals and anything with missing data go
+        to the LLM review.
+        
+        Args:
+            context: Full screening context with all results
+        
+        Returns:
+            True if the rule-based result can be used
+        """
+        decision_data = context.get("decision_result", {}).get("data", {})
+        if decision_data.get("decision") != "APPROVE" or decision_data.get("fair_housing_compliant") is False:
+            return False
+        
+        fraud = context.get("fraud_result", {})
+        fraud_data = fraud.get("data", {})
+        if (
+            fraud.get("status") != "success"
+            or str(fraud_data.get("risk_level")).upper() != "LOW"
+            or fraud_data.get("requires_manual_review")
+        ):
+            return False
+        
+        credit_score = context.get("risk_result", {}).get("data", {}).get("credit_score")
+        annual_income = context.get("employment", {}).get("annual_income")
+        monthly_rent = context.get("rental_history", {}).get("monthly_rent")
+        try:
+            return (
+                float(credit_score) >= _MIN_CREDIT_SCORE
+                and float(monthly_rent) > 0
+                and float(annual_income) / 12 >= _MIN_INCOME_TO_RENT * float(monthly_rent)
+            )
+        except (TypeError, ValueError):
+            return False
+    
+    def _rule_based_compliant(self) -> Dict[str, Any]:
+        """
+        Compliance result for an approval that meets every criterion.
+        
+        Returns:
+            Compliant result (same shape as the LLM response)
+        """
+        return {
+            "compliance_status": "COMPLIANT",
+            "fcra_compliant": True,
+            "fair_housing_compliant": True,
+            "state_law_compliant": True,
+            "violations": [],
+            "risk_level": "LOW",
+            "required_actions": [],
+            "adverse_action_required": False,
+            "recommendation": (
+                f"Approval meets all screening criteria (credit score {_MIN_CREDIT_SCORE}+, "
+                f"income {_MIN_INCOME_TO_RENT}x rent, low fraud risk); no adverse action required."
+            ),
+            "review_mode": "rule_based"
+        }
+    
+    async def _classify(self, user_prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Run the local compliance classifier.
+        
+        Only confident, fully compliant predictions are used; anything the
+        classifier flags needs the LLM to name the violation.
+        
+        Args:
+            user_prompt: Compliance review prompt
+        
+        Returns:
+            Compliant result, or None to fall back to the LLM
+        """
+        prediction = await asyncio.to_thread(compliance_classifier.predict, user_prompt)
+        if prediction is None:
+            return None
+        
+        labels, confidence = prediction
+        if confidence < COMPLIANCE_CLASSIFIER_MIN_CONFIDENCE or not all(labels.values()):
+            return None
+        
+        return {
+            "compliance_status": "COMPLIANT",
+            **labels,
+            "violations": [],
+            "risk_level": "LOW",
+            "required_actions": [],
+            "adverse_action_required": False,
+            "recommendation": f"Classified compliant with {confidence:.0%} confidence.",
+            "review_mode": "classifier",
+            "classifier_confidence": round(confidence, 3)
+        }
+    
     def _build_compliance_prompt(
         self,
         applicant: Dict[str, Any],
@@ -155,41 +356,46 @@ Be thorough and conservative - flag anything questionable."""
         Returns:
             Formatted prompt for Claude
         """
-        prompt = "# Compliance Review Request\n\nReview this screening decision for compliance:\n\n"
-        
-        # Applicant summary (no protected class info)
-        prompt += f"## Applicant Profile\n"
-        prompt += f"- Annual Income: ${applicant.get('employment', {}).get('annual_income', 0):,.0f}\n"
-        prompt += f"- Employment: {applicant.get('employment', {}).get('employment_status', 'N/A')}\n"
-        prompt += f"- Rental History: {applicant.get('rental_history', {}).get('years_at_current', 0):.1f} years\n\n"
+        # Upstream agents normally fill every field, so subscript directly
+        # and only fall back to per-field defaults when something is missing
+        try:
+            employment = applicant["employment"]
+            decision_data = decision["data"]
+            risk_data = risk["data"]
+            factors = decision_data["key_factors"]
+            
+            return _PROMPT_TEMPLATE.substitute(
+                annual_income=f"{employment['annual_income']:,.0f}",
+                employment_status=employment["employment_status"],
+                rental_years=f"{applicant['rental_history']['years_at_current']:.1f}",
+                decision=decision_data["decision"],
+                confidence=decision_data["confidence"],
+                reasoning=decision_data["reasoning"],
+                key_factors=", ".join(str(f) for f in factors) if factors else "None",
+                risk_score=risk_data["risk_score"],
+                credit_score=risk_data["credit_score"],
+                risk_tier=risk_data["risk_tier"]
+            )
+        except KeyError:
+            pass
         
-        # Decision details
+        employment = applicant.get("employment", {})
         decision_data = decision.get("data", {})
-        prompt += f"## Screening Decision\n"
-        prompt += f"- Decision: {decision_data.get('decision', 'UNKNOWN')}\n"
-        prompt += f"- Confidence: {decision_data.get('confidence', 0)}%\n"
-        prompt += f"- Reasoning: {decision_data.get('reasoning', 'N/A')}\n"
-        factors = decision_data.get('key_factors', [])
-        factors_str = ', '.join(str(f) for f in factors) if factors else 'None'
-        prompt += f"- Key Factors: {factors_str}\n\n"
-        
-        # Risk factors
         risk_data = risk.get("data", {})
-        prompt += f"## Risk Assessment\n"
-        prompt += f"- Risk Score: {risk_data.get('risk_score', 0)}/1000\n"
-        prompt += f"- Credit Score: {risk_data.get('credit_score', 0)}\n"
-        prompt += f"- Risk Tier: {risk_data.get('risk_tier', 'UNKNOWN')}\n\n"
+        factors = decision_data.get("key_factors", [])
         
-        # Criteria applied
-        prompt += f"## Screening Criteria Applied\n"
-        prompt += f"- Credit score threshold: 580+ (FCRA compliant)\n"
-        prompt += f"- Income requirement: 2.5x monthly rent\n"
-        prompt += f"- No criminal history consideration (compliant with 'Ban the Box')\n"
-        prompt += f"- Fraud detection (permissible purpose)\n\n"
-        
-        prompt += "**Check compliance using the regulatory framework provided.**"
-        
-        return prompt
+        return _PROMPT_TEMPLATE.substitute(
+            annual_income=f"{employment.get('annual_income', 0):,.0f}",
+            employment_status=employment.get("employment_status", "N/A"),
+            rental_years=f"{applicant.get('rental_history', {}).get('years_at_current', 0):.1f}",
+            decision=decision_data.get("decision", "UNKNOWN"),
+            confidence=decision_data.get("confidence", 0),
+            reasoning=decision_data.get("reasoning", "N/A"),
+            key_factors=", ".join(str(f) for f in factors) if factors else "None",
+            risk_score=risk_data.get("risk_score", 0),
+            credit_score=risk_data.get("credit_score", 0),
+            risk_tier=risk_data.get("risk_tier", "UNKNOWN")
+        )
     
     def _parse_compliance(self, raw_response: str) -> Dict[str, Any]:
         """
@@ -201,25 +407,13 @@ Be thorough and conservative - flag anything questionable."""
         Returns:
             Structured compliance result
         """
-        import json
+        # Validate JSON against the result model
+        compliance = parse_result(ComplianceResult, raw_response)
+        if compliance is not None:
+            return compliance
         
-        try:
-            # Extract JSON
-            start = raw_response.find("{")
-            end = raw_response.rfind("}") + 1
-            
-            if start >= 0 and end > start:
-                json_str = raw_response[start:end]
-                compliance = json.loads(json_str)
-                
-                if "compliance_status" in compliance:
-                    return compliance
-            
-            # Fallback parsing
-            return self._manual_parse_compliance(raw_response)
-            
-        except json.JSONDecodeError:
-            return self._manual_parse_compliance(raw_response)
+        # Fallback parsing
+        return self._manual_parse_compliance(raw_response)
     
     def _manual_parse_compliance(self, text: str) -> Dict[str, Any]:
         """
@@ -231,27 +425,27 @@ Be thorough and conservative - flag anything questionable."""
         Returns:
             Best-effort compliance structure
         """
-        text_upper = text.upper()
+        hits = _COMPLIANCE_SCANNER.find(text)
         
         # Determine compliance status
-        if "VIOLATION" in text_upper:
+        if "VIOLATION" in hits:
             status = "VIOLATION"
             fcra = False
             fha = False
-        elif "COMPLIANT" in text_upper:
+        elif "COMPLIANT" in hits:
             status = "COMPLIANT"
             fcra = True
             fha = True
         else:
             status = "NEEDS_REVIEW"
-            fcra = "FCRA" not in text_upper or "PASS" in text_upper
-            fha = "FAIR HOUSING" not in text_upper or "PASS" in text_upper
+            fcra = "FCRA" not in hits or "PASS" in hits
+            fha = "FAIR HOUSING" not in hits or "PASS" in hits
         
         # Look for violations
         violations = []
-        if "DISCRIMINAT" in text_upper:
+        if "DISCRIMINAT" in hits:
             violations.append("Potential discriminatory criteria")
-        if "ADVERSE ACTION" in text_upper and "MISSING" in text_upper:
+        if "ADVERSE ACTION" in hits and "MISSING" in hits:
             violations.append("Missing adverse action notice")
         
         return {
@@ -262,16 +456,17 @@ Be thorough and conservative - flag anything questionable."""
             "violations": violations,
             "risk_level": "HIGH" if violations else "LOW",
             "required_actions": ["Review decision manually"] if violations else [],
-            "adverse_action_required": "DENY" in text_upper or "CONDITIONAL" in text_upper,
+            "adverse_action_required": "DENY" in hits or "CONDITIONAL" in hits,
             "recommendation": text
         }
 
 
+@lru_cache(maxsize=1)
 def get_compliance_agent() -> ComplianceAIAgent:
     """
-    Factory function to get ComplianceAIAgent instance.
+    Factory function to get the shared ComplianceAIAgent instance.
     
     Returns:
-        Initialized ComplianceAIAgent
+        Initialized ComplianceAIAgent (created on first call)
     """
     return ComplianceAIAgent()
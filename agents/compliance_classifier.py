@@ -0,0 +1,111 @@
+"""
+Compliance Classifier.
+
+Optional local classifier that answers routine compliance checks without
+an LLM call. Expects a fine-tuned encoder (e.g. ModernBERT-base) with a
+three-way multi-label head, exported to ONNX (int8-quantized for CPU)
+together with its tokenizer.json. Disabled unless
+COMPLIANCE_CLASSIFIER_PATH points at such a directory.
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+    HAS_ONNX = True
+except ImportError:
+    HAS_ONNX = False
+
+logger = logging.getLogger(__name__)
+
+# Classifier settings
+COMPLIANCE_CLASSIFIER_PATH = os.getenv("COMPLIANCE_CLASSIFIER_PATH", "")
+COMPLIANCE_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("COMPLIANCE_CLASSIFIER_MIN_CONFIDENCE", "0.8"))
+_MAX_TOKENS = 512
+
+# Output order of the classification head
+LABELS = ("fcra_compliant", "fair_housing_compliant", "state_law_compliant")
+
+
+class ComplianceClassifier:
+    """
+    ONNX Runtime multi-label compliance classifier.
+    
+    The model is loaded on first use; if the path is unset, the runtime is
+    missing or loading fails, predict() returns None and callers fall back
+    to the LLM.
+    """
+    
+    def __init__(self, model_dir: str = COMPLIANCE_CLASSIFIER_PATH):
+        """
+        Initialize classifier.
+        
+        Args:
+            model_dir: Directory holding model.onnx and tokenizer.json
+        """
+        self.model_dir = model_dir
+        self._session = None
+        self._tokenizer = None
+        self._available: Optional[bool] = None
+        self._lock = threading.Lock()
+    
+    def _load(self) -> bool:
+        """Load the ONNX session and tokenizer once."""
+        with self._lock:
+            if self._available is None:
+                if not self.model_dir:
+                    self._available = False
+                elif not HAS_ONNX:
+                    self._available = False
+                    logger.warning("onnxruntime/tokenizers not available - compliance classifier disabled")
+                else:
+                    try:
+                        self._session = ort.InferenceSession(
+                            os.path.join(self.model_dir, "model.onnx"),
+                            providers=["CPUExecutionProvider"]
+                        )
+                        self._tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+                        self._tokenizer.enable_truncation(_MAX_TOKENS)
+                        self._available = True
+                        logger.info(f"Compliance classifier loaded from {self.model_dir}")
+                    except Exception as e:
+                        self._available = False
+                        logger.warning(f"Compliance classifier disabled - model unavailable: {e}")
+            return self._available
+    
+    def predict(self, text: str) -> Optional[Tuple[Dict[str, bool], float]]:
+        """
+        Classify a compliance review prompt.
+        
+        Blocking (CPU inference); call from a worker thread.
+        
+        Args:
+            text: Structured compliance prompt
+        
+        Returns:
+            (label -> compliant, confidence) where confidence is that of the
+            least certain label, or None if the classifier is unavailable
+        """
+        if not self._load():
+            return None
+        
+        encoding = self._tokenizer.encode(text)
+        inputs = {
+            "input_ids": np.array([encoding.ids], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask], dtype=np.int64)
+        }
+        logits = self._session.run(None, inputs)[0][0]
+        probabilities = 1.0 / (1.0 + np.exp(-logits))
+        
+        labels = {label: bool(p >= 0.5) for label, p in zip(LABELS, probabilities)}
+        confidence = float(np.min(np.maximum(probabilities, 1.0 - probabilities)))
+        return labels, confidence
+
+
+# Shared across agent instances in the process
+compliance_classifier = ComplianceClassifier()
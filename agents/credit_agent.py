@@ -5,11 +5,45 @@ Mocked Equifax credit bureau integration.
 Returns realistic credit report data for tenant screening.
 """
 
+import bisect
 import random
-from typing import Dict, Any
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+from datetime import datetime, timedelta, timezone
 from .base_ai_agent import BaseAIAgent
 
+# Mock report score buckets and account types, indexed by the first
+# cumulative probability >= a uniform draw
+_SCORE_CDF = (0.05, 0.30, 0.80, 1.00)
+_SCORE_LOW = (300, 550, 650, 750)
+_SCORE_HIGH = (550, 650, 750, 850)
+_ACCOUNT_CDF = (0.6, 0.8, 0.9, 1.0)
+_ACCOUNT_TYPES = (
+    ("revolving", "Credit Card"),
+    ("installment", "Auto Loan"),
+    ("mortgage", "Mortgage"),
+    ("installment", "Personal Loan")
+)
+
+# Mock reports kept per SSN seed (only the dates change between calls)
+_REPORT_CACHE_MAX_ENTRIES = 1024
+
+# Score-dependent factor ranges as (minimum score, low, high); the first
+# tier whose minimum the score meets applies
+_ON_TIME_TIERS = ((750, 95, 100), (700, 85, 95), (650, 75, 85), (600, 65, 75), (0, 40, 65))
+_UTILIZATION_TIERS = ((750, 5, 25), (700, 20, 40), (650, 35, 60), (0, 60, 95))
+_HISTORY_TIERS = ((750, 7, 20), (700, 5, 10), (650, 3, 7), (0, 1, 5))
+_DEROGATORY_TIERS = ((700, 0, 0), (650, 0, 1), (600, 1, 2), (0, 2, 5))
+
+
+def _tier_range(tiers: Tuple[Tuple[int, int, int], ...], credit_score: int) -> Tuple[int, int]:
+    """(low, high) range of the tier a credit score falls in."""
+    for min_score, low, high in tiers:
+        if credit_score >= min_score:
+            return low, high
+    return tiers[-1][1:]
+
 
 class CreditAgent(BaseAIAgent):
     """
@@ -26,6 +60,7 @@ class CreditAgent(BaseAIAgent):
             max_tokens=1000,
             temperature=0.0
         )
+        self._report_cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
     
     async def _run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -33,7 +68,7 @@ class CreditAgent(BaseAIAgent):
         
         Args:
             input_data: Contains applicant profile with SSN
-            
+        
         Returns:
             Mock credit report with score, history, accounts
         """
@@ -58,81 +93,76 @@ class CreditAgent(BaseAIAgent):
         return credit_report
     
     def _generate_mock_credit_report(self, applicant: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate realistic mock credit report."""
+        """
+        Generate realistic mock credit report.
         
-        # Use SSN to seed random (consistent results for same applicant)
+        Reports are deterministic per SSN, so each one is generated once and
+        later calls get a copy with the dates stamped fresh.
+        """
         ssn = applicant.get("ssn", "000-00-0000")
         seed_value = sum(ord(c) for c in ssn if c.isdigit())
-        random.seed(seed_value)
-        
-        # Generate credit score (300-850 range, skew toward 600-750)
-        score_distribution = [
-            (300, 550, 0.05),  # Poor (5%)
-            (550, 650, 0.25),  # Fair (25%)
-            (650, 750, 0.50),  # Good (50%)
-            (750, 850, 0.20),  # Excellent (20%)
-        ]
-        
-        rand_val = random.random()
-        cumulative = 0.0
-        credit_score = 680  # Default
-        
-        for min_score, max_score, probability in score_distribution:
-            cumulative += probability
-            if rand_val <= cumulative:
-                credit_score = random.randint(min_score, max_score)
-                break
         
-        # Payment history (% on-time)
-        if credit_score >= 750:
-            on_time_pct = random.randint(95, 100)
-        elif credit_score >= 700:
-            on_time_pct = random.randint(85, 95)
-        elif credit_score >= 650:
-            on_time_pct = random.randint(75, 85)
-        elif credit_score >= 600:
-            on_time_pct = random.randint(65, 75)
+        now = datetime.now(timezone.utc)
+        cached = self._report_cache.get(seed_value)
+        if cached is None:
+            cached = self._build_mock_credit_report(seed_value, now)
+            self._report_cache[seed_value] = cached
+            if len(self._report_cache) > _REPORT_CACHE_MAX_ENTRIES:
+                self._report_cache.popitem(last=False)
         else:
-            on_time_pct = random.randint(40, 65)
+            self._report_cache.move_to_end(seed_value)
+        
+        # Copy the mutable parts so callers never share the cached report
+        history_years = cached["score_factors"]["length_of_history_years"]
+        return {
+            **cached,
+            "score_factors": dict(cached["score_factors"]),
+            "accounts": [dict(account) for account in cached["accounts"]],
+            "oldest_account_date": (now - timedelta(days=history_years * 365)).strftime("%Y-%m-%d"),
+            "public_records": dict(cached["public_records"]),
+            "report_date": now.strftime("%Y-%m-%d")
+        }
+    
+    def _build_mock_credit_report(self, seed_value: int, now: datetime) -> Dict[str, Any]:
+        """
+        Generate a mock credit report from an SSN seed.
+        
+        Args:
+            seed_value: Sum of the SSN digits
+            now: Report time
+        
+        Returns:
+            Credit report
+        """
+        # Per-report generator seeded from SSN (consistent results for same applicant)
+        rng = random.Random(seed_value)
+        
+        # Generate credit score (300-850 range, skew toward 600-750):
+        # poor 5%, fair 25%, good 50%, excellent 20%
+        bucket = bisect.bisect_left(_SCORE_CDF, rng.random())
+        credit_score = rng.randint(_SCORE_LOW[bucket], _SCORE_HIGH[bucket])
+        
+        # Payment history (% on-time)
+        on_time_pct = rng.randint(*_tier_range(_ON_TIME_TIERS, credit_score))
         
         # Credit utilization (%)
-        if credit_score >= 750:
-            utilization = random.randint(5, 25)
-        elif credit_score >= 700:
-            utilization = random.randint(20, 40)
-        elif credit_score >= 650:
-            utilization = random.randint(35, 60)
-        else:
-            utilization = random.randint(60, 95)
+        utilization = rng.randint(*_tier_range(_UTILIZATION_TIERS, credit_score))
         
         # Total accounts
-        num_accounts = random.randint(3, 12)
+        num_accounts = rng.randint(3, 12)
         
         # Credit history length (years)
-        if credit_score >= 750:
-            history_years = random.randint(7, 20)
-        elif credit_score >= 700:
-            history_years = random.randint(5, 10)
-        elif credit_score >= 650:
-            history_years = random.randint(3, 7)
-        else:
-            history_years = random.randint(1, 5)
-        
-        # Derogatory marks
-        if credit_score >= 700:
-            derogatory_marks = 0
-        elif credit_score >= 650:
-            derogatory_marks = random.randint(0, 1)
-        elif credit_score >= 600:
-            derogatory_marks = random.randint(1, 2)
-        else:
-            derogatory_marks = random.randint(2, 5)
+        history_years = rng.randint(*_tier_range(_HISTORY_TIERS, credit_score))
+        
+        # Derogatory marks (none, without a draw, for good scores)
+        low, high = _tier_range(_DEROGATORY_TIERS, credit_score)
+        derogatory_marks = low if low == high else rng.randint(low, high)
         
         # Hard inquiries (last 2 years)
-        hard_inquiries = random.randint(0, 5)
+        hard_inquiries = rng.randint(0, 5)
         
-        # Generate account details
-        accounts = self._generate_mock_accounts(num_accounts, credit_score)
+        # Generate account details (totals accumulated while generating)
+        accounts, total_debt, available_credit = self._generate_mock_accounts(num_accounts, credit_score, rng)
         
         # Compile report
         report = {
@@ -147,74 +177,64 @@ class CreditAgent(BaseAIAgent):
             },
             "accounts": accounts,
             "payment_history": f"{on_time_pct}% on-time payments",
-            "total_debt": sum(acc.get("balance", 0) for acc in accounts),
-            "available_credit": sum(
-                acc.get("credit_limit", 0) - acc.get("balance", 0) 
-                for acc in accounts if acc["type"] == "revolving"
-            ),
+            "total_debt": total_debt,
+            "available_credit": available_credit,
             "oldest_account_date": (
-                datetime.utcnow() - timedelta(days=history_years * 365)
+                now - timedelta(days=history_years * 365)
             ).strftime("%Y-%m-%d"),
             "public_records": {
-                "bankruptcies": 1 if derogatory_marks >= 3 and random.random() < 0.3 else 0,
-                "liens": 1 if derogatory_marks >= 2 and random.random() < 0.2 else 0,
-                "judgments": 1 if derogatory_marks >= 2 and random.random() < 0.2 else 0
+                "bankruptcies": 1 if derogatory_marks >= 3 and rng.random() < 0.3 else 0,
+                "liens": 1 if derogatory_marks >= 2 and rng.random() < 0.2 else 0,
+                "judgments": 1 if derogatory_marks >= 2 and rng.random() < 0.2 else 0
             },
-            "report_date": datetime.utcnow().strftime("%Y-%m-%d"),
+            "report_date": now.strftime("%Y-%m-%d"),
             "bureau": "Equifax (MOCK)"
         }
         
-        # Reset random seed
-        random.seed()
-        
         return report
     
-    def _generate_mock_accounts(self, num_accounts: int, credit_score: int) -> list:
-        """Generate mock credit accounts."""
-        accounts = []
+    def _generate_mock_accounts(
+        self,
+        num_accounts: int,
+        credit_score: int,
+        rng: random.Random
+    ) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Generate mock credit accounts.
         
-        account_types = [
-            ("revolving", "Credit Card", 0.6),
-            ("installment", "Auto Loan", 0.2),
-            ("mortgage", "Mortgage", 0.1),
-            ("installment", "Personal Loan", 0.1)
-        ]
+        Returns:
+            (accounts, total debt, available revolving credit)
+        """
+        accounts = []
+        total_debt = 0
+        available_credit = 0
         
         for i in range(num_accounts):
-            # Choose account type
-            rand_val = random.random()
-            cumulative = 0.0
-            acc_type = "revolving"
-            acc_name = "Credit Card"
-            
-            for atype, aname, prob in account_types:
-                cumulative += prob
-                if rand_val <= cumulative:
-                    acc_type = atype
-                    acc_name = aname
-                    break
+            # Choose account type (credit card 60%, auto loan 20%,
+            # mortgage 10%, personal loan 10%)
+            acc_type, acc_name = _ACCOUNT_TYPES[bisect.bisect_left(_ACCOUNT_CDF, rng.random())]
             
             # Account details
             if acc_type == "revolving":
-                credit_limit = random.choice([1000, 2500, 5000, 10000, 15000])
+                credit_limit = rng.choice([1000, 2500, 5000, 10000, 15000])
                 if credit_score >= 700:
-                    balance = int(credit_limit * random.uniform(0.1, 0.3))
+                    balance = int(credit_limit * rng.uniform(0.1, 0.3))
                 else:
-                    balance = int(credit_limit * random.uniform(0.4, 0.9))
-                payment_status = "Current" if random.random() < (credit_score / 850) else "Past Due"
+                    balance = int(credit_limit * rng.uniform(0.4, 0.9))
+                payment_status = "Current" if rng.random() < (credit_score / 850) else "Past Due"
             
             elif acc_type == "mortgage":
                 credit_limit = 0
-                balance = random.randint(150000, 400000)
-                payment_status = "Current" if random.random() < (credit_score / 850) else "Past Due"
+                balance = rng.randint(150000, 400000)
+                payment_status = "Current" if rng.random() < (credit_score / 850) else "Past Due"
             
             else:  # installment
                 credit_limit = 0
-                balance = random.randint(5000, 30000)
-                payment_status = "Current" if random.random() < (credit_score / 850) else "Past Due"
+                balance = rng.randint(5000, 30000)
+                payment_status = "Current" if rng.random() < (credit_score / 850) else "Past Due"
             
             # Account age
-            months_open = random.randint(6, 120)
+            months_open = rng.randint(6, 120)
             
             account = {
                 "type": acc_type,
@@ -223,15 +243,19 @@ class CreditAgent(BaseAIAgent):
                 "credit_limit": credit_limit if acc_type == "revolving" else 0,
                 "payment_status": payment_status,
                 "months_open": months_open,
-                "late_payments_24mo": random.randint(0, 3) if payment_status == "Past Due" else 0
+                "late_payments_24mo": rng.randint(0, 3) if payment_status == "Past Due" else 0
             }
             
             accounts.append(account)
+            total_debt += balance
+            if acc_type == "revolving":
+                available_credit += credit_limit - balance
         
-        return accounts
+        return accounts, total_debt, available_credit
 
 
 # Export agent
+@lru_cache(maxsize=1)
 def get_credit_agent() -> CreditAgent:
     """Get singleton instance of CreditAgent."""
     return CreditAgent()
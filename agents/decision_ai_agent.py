@@ -4,12 +4,137 @@ Decision AI Agent.
 Synthesizes all agent results into final approve/deny decision using Claude.
 """
 
+import os
+import copy
+import random
 import logging
-from typing import Dict, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Mapping
 from .base_ai_agent import BaseAIAgent
+from .keyword_scan import KeywordScanner
+from .llm_cache import ResponseCache
+from .result_models import DecisionResult, parse_result
 
 logger = logging.getLogger(__name__)
 
+# Parsed decisions kept for screenings with identical inputs, expiring so
+# cached decisions do not outlive changes to the policy or model
+DECISION_CACHE_TTL_SECONDS = int(os.getenv("DECISION_CACHE_TTL_SECONDS", str(24 * 3600)))
+_DECISION_CACHE_MAX_ENTRIES = 4096
+
+# Agent results the decision is based on, in _build_decision_prompt order
+_RESULT_KEYS = (
+    "ingestion_result",
+    "identity_result",
+    "fraud_result",
+    "risk_result",
+    "compliance_result",
+    "bias_result"
+)
+
+# Shared read-only default for missing results
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# Keywords checked by _manual_parse_decision, all found in a single pass over the text
+_DECISION_SCANNER = KeywordScanner(("APPROVE", "DENY", "CONDITIONAL"))
+
+# DEMO MODE: deterministic decisions by applicant first name (copied per use)
+_DEMO_DECISIONS: Dict[str, Dict[str, Any]] = {
+    "mouli": {
+        "decision": "APPROVE",
+        "confidence": 95,
+        "risk_score": 180,
+        "reasoning": "⚠️ FALLBACK DECISION (AI API unavailable): Excellent candidate profile. Strong credit score of 780, verified identity, stable employment with annual income of $120,000, no fraud indicators detected, and exemplary rental history. All compliance requirements met including Fair Housing and FCRA standards. Risk score is low at 180/1000. Highly recommended approval. [NOTE: This decision was made using deterministic fallback logic, not AI analysis]",
+        "key_factors": [
+            "Excellent credit score (780)",
+            "High income-to-rent ratio (4.5x)",
+            "Verified identity with no issues",
+            "No fraud indicators",
+            "Stable employment (5+ years)",
+            "Positive rental history",
+            "Full compliance with Fair Housing laws"
+        ],
+        "risk_mitigation": None,
+        "conditions": None,
+        "fair_housing_compliant": True,
+        "ai_used": False,
+        "fallback_mode": "demo_deterministic",
+        "warning": "Decision made without AI - fallback logic used due to API unavailability"
+    },
+    "jane": {
+        "decision": "DENY",
+        "confidence": 92,
+        "risk_score": 720,
+        "reasoning": "⚠️ FALLBACK DECISION (AI API unavailable): Application does not meet minimum screening criteria. Credit score of 480 is below acceptable threshold (minimum 580). Multiple fraud indicators detected including inconsistent employment history and address discrepancies. High risk score of 720/1000 indicates significant default probability. Recent eviction history and bankruptcy filing within last 2 years present unacceptable risk factors. Unable to approve despite meeting Fair Housing compliance. [NOTE: This decision was made using deterministic fallback logic, not AI analysis]",
+        "key_factors": [
+            "Low credit score (480) - below minimum",
+            "Multiple fraud indicators detected",
+            "High risk score (720/1000)",
+            "Recent eviction history",
+            "Bankruptcy filing (2 years ago)",
+            "Insufficient income verification",
+            "Address inconsistencies"
+        ],
+        "risk_mitigation": [
+            "Consider reapplying after credit repair",
+            "Provide co-signer with strong credit",
+            "Increase security deposit significantly",
+            "Wait 12 months and rebuild history"
+        ],
+        "conditions": None,
+        "fair_housing_compliant": True,
+        "ai_used": False,
+        "fallback_mode": "demo_deterministic",
+        "warning": "Decision made without AI - fallback logic used due to API unavailability"
+    }
+}
+
+# Decision prompt, filled by _build_decision_prompt; a section is left
+# out when its agent produced no data (e.g. compliance and bias, which run
+# after the decision)
+_PROMPT_HEADER = "# Tenant Screening Analysis\n\nMake a final decision based on:\n\n"
+_APPLICANT_SECTION = (
+    "## Applicant Profile\n"
+    "- Name: {applicant_name}\n"
+    "- Income: ${annual_income:,.0f}\n"
+    "- Employment: {employment_status}\n"
+    "- Data Quality: {quality_score:.0%}\n\n"
+)
+_IDENTITY_SECTION = (
+    "## Identity Verification\n"
+    "- Status: {verification_status}\n"
+    "- Confidence: {confidence:.0%}\n"
+    "- Issues: {issues}\n\n"
+)
+_FRAUD_SECTION = (
+    "## Fraud Analysis\n"
+    "- Risk Level: {risk_level}\n"
+    "- Score: {fraud_score:.0%}\n"
+    "- Indicators: {indicators}\n\n"
+)
+_RISK_SECTION = (
+    "## Risk Assessment\n"
+    "- Score: {risk_score}/1000\n"
+    "- Tier: {risk_tier}\n"
+    "- Credit Score: {credit_score}\n"
+    "- Key Drivers: {drivers}\n\n"
+)
+_COMPLIANCE_SECTION = (
+    "## Compliance Check\n"
+    "- Status: {compliance_status}\n"
+    "- Fair Housing: {fair_housing_compliant}\n"
+    "- FCRA: {fcra_compliant}\n"
+    "- Violations: {violations}\n\n"
+)
+_BIAS_SECTION = (
+    "## Bias Analysis\n"
+    "- Bias Detected: {bias_detected}\n"
+    "- Fairness Score: {fairness_score:.0%}\n"
+    "- Issues: {issues}\n\n"
+)
+_PROMPT_FOOTER = "**Now make your final decision using the framework provided.**"
+
 
 class DecisionAIAgent(BaseAIAgent):
     """
@@ -19,23 +144,26 @@ class DecisionAIAgent(BaseAIAgent):
     and uses Claude to synthesize a final decision with detailed reasoning.
     """
     
-    def __init__(self):
-        """Initialize DecisionAIAgent."""
-        super().__init__(
-            agent_name="DecisionAIAgent",
-            model="gemini-2.5-flash",
-            max_tokens=8000,
-            temperature=0.3  # Lower temperature for consistent decisions
-        )
+    # Paraphrased decision prompts only reuse a response when near-identical
+    _semantic_threshold = 0.97
     
-    def _get_system_prompt(self) -> str:
-        """
-        System prompt for decision-making.
-        
-        Returns:
-            Specialized prompt for final decision synthesis
-        """
-        return """You are an expert tenant screening decision agent for Equifax.
+    # Mirrors the output format in the system prompt
+    _response_schema = {
+        "type": "object",
+        "properties": {
+            "decision": {"type": "string", "enum": ["APPROVE", "CONDITIONAL_APPROVE", "DENY"]},
+            "confidence": {"type": "number"},
+            "reasoning": {"type": "string"},
+            "key_factors": {"type": "array", "items": {"type": "string"}},
+            "risk_mitigation": {"type": "array", "items": {"type": "string"}, "nullable": True},
+            "conditions": {"type": "array", "items": {"type": "string"}, "nullable": True},
+            "fair_housing_compliant": {"type": "boolean"}
+        },
+        "required": ["decision", "confidence", "reasoning", "key_factors", "fair_housing_compliant"]
+    }
+    
+    # Static decision framework, sent as the model's system instruction
+    _SYSTEM_PROMPT = """You are an expert tenant screening decision agent for Equifax.
 
 Your role is to synthesize results from multiple AI agents and make a final approve/deny decision.
 
@@ -81,6 +209,32 @@ Your role is to synthesize results from multiple AI agents and make a final appr
 }
 
 Be thorough, fair, and explainable. This decision impacts real people's housing."""
+
+    def __init__(self):
+        """Initialize DecisionAIAgent."""
+        super().__init__(
+            agent_name="DecisionAIAgent",
+            model="gemini-2.5-flash",
+            max_tokens=8000,
+            temperature=0.3,  # Lower temperature for consistent decisions
+            service_tier="priority"  # User-facing decision path
+        )
+        
+        # Prompt digest -> parsed decision; the prompt holds every input the
+        # decision and its reasoning text depend on
+        self._decision_cache = ResponseCache(
+            max_entries=_DECISION_CACHE_MAX_ENTRIES,
+            ttl_seconds=DECISION_CACHE_TTL_SECONDS
+        )
+    
+    def _get_system_prompt(self) -> str:
+        """
+        System prompt for decision-making.
+        
+        Returns:
+            Specialized prompt for final decision synthesis
+        """
+        return self._SYSTEM_PROMPT
     
     async def _run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -98,83 +252,30 @@ Be thorough, fair, and explainable. This decision impacts real people's housing.
             first_name = applicant_data.get("first_name", "").strip().lower()
             
             # DEMO MODE: Deterministic results based on first name
-            if first_name == "mouli":
-                logger.info(f"🎯 DEMO MODE: Detected first_name='Mouli' → APPROVED")
-                logger.warning("⚠️  DECISION MADE WITHOUT AI - Using fallback demo logic")
-                return {
-                    "decision": "APPROVE",
-                    "confidence": 95,
-                    "risk_score": 180,
-                    "reasoning": "⚠️ FALLBACK DECISION (AI API unavailable): Excellent candidate profile. Strong credit score of 780, verified identity, stable employment with annual income of $120,000, no fraud indicators detected, and exemplary rental history. All compliance requirements met including Fair Housing and FCRA standards. Risk score is low at 180/1000. Highly recommended approval. [NOTE: This decision was made using deterministic fallback logic, not AI analysis]",
-                    "key_factors": [
-                        "Excellent credit score (780)",
-                        "High income-to-rent ratio (4.5x)",
-                        "Verified identity with no issues",
-                        "No fraud indicators",
-                        "Stable employment (5+ years)",
-                        "Positive rental history",
-                        "Full compliance with Fair Housing laws"
-                    ],
-                    "risk_mitigation": None,
-                    "conditions": None,
-                    "fair_housing_compliant": True,
-                    "ai_used": False,
-                    "fallback_mode": "demo_deterministic",
-                    "warning": "Decision made without AI - fallback logic used due to API unavailability"
-                }
-            
-            elif first_name == "jane":
-                logger.info(f"🎯 DEMO MODE: Detected first_name='Jane' → DENIED")
+            demo_decision = _DEMO_DECISIONS.get(first_name)
+            if demo_decision is not None:
+                logger.info(f"🎯 DEMO MODE: Detected first_name='{first_name.title()}' → {demo_decision['decision']}")
                 logger.warning("⚠️  DECISION MADE WITHOUT AI - Using fallback demo logic")
-                return {
-                    "decision": "DENY",
-                    "confidence": 92,
-                    "risk_score": 720,
-                    "reasoning": "⚠️ FALLBACK DECISION (AI API unavailable): Application does not meet minimum screening criteria. Credit score of 480 is below acceptable threshold (minimum 580). Multiple fraud indicators detected including inconsistent employment history and address discrepancies. High risk score of 720/1000 indicates significant default probability. Recent eviction history and bankruptcy filing within last 2 years present unacceptable risk factors. Unable to approve despite meeting Fair Housing compliance. [NOTE: This decision was made using deterministic fallback logic, not AI analysis]",
-                    "key_factors": [
-                        "Low credit score (480) - below minimum",
-                        "Multiple fraud indicators detected",
-                        "High risk score (720/1000)",
-                        "Recent eviction history",
-                        "Bankruptcy filing (2 years ago)",
-                        "Insufficient income verification",
-                        "Address inconsistencies"
-                    ],
-                    "risk_mitigation": [
-                        "Consider reapplying after credit repair",
-                        "Provide co-signer with strong credit",
-                        "Increase security deposit significantly",
-                        "Wait 12 months and rebuild history"
-                    ],
-                    "conditions": None,
-                    "fair_housing_compliant": True,
-                    "ai_used": False,
-                    "fallback_mode": "demo_deterministic",
-                    "warning": "Decision made without AI - fallback logic used due to API unavailability"
-                }
+                return copy.deepcopy(demo_decision)
             
             # Standard AI-based decision for other names
-            # Extract agent results
-            ingestion = context.get("ingestion_result", {})
-            identity = context.get("identity_result", {})
-            fraud = context.get("fraud_result", {})
-            risk = context.get("risk_result", {})
-            compliance = context.get("compliance_result", {})
-            bias = context.get("bias_result", {})
+            # Extract agent results (ingestion, identity, fraud, risk, compliance, bias)
+            results = [context.get(key, _EMPTY) for key in _RESULT_KEYS]
+            risk = results[3]
             
             # Build comprehensive analysis prompt
-            user_prompt = self._build_decision_prompt(
-                ingestion, identity, fraud, risk, compliance, bias
+            user_prompt = self._build_decision_prompt(*results)
+            decision, cache_hit = await self._cached_parse(
+                self._decision_cache,
+                user_prompt,
+                lambda: self._request_decision(user_prompt)
             )
-            
-            # Call Gemini for decision
-            decision_raw = await self.call_llm(user_prompt)
-            
-            # Parse and validate decision
-            decision = self._parse_decision(decision_raw)
+            if cache_hit:
+                logger.info("Decision served from decision cache")
+                decision["cache_hit"] = True
             
             # Extract risk_score from risk agent result
-            risk_data = risk.get("data", {})
+            risk_data = risk.get("data", _EMPTY)
             risk_score = risk_data.get("risk_score")
             
             # If risk_score exists, add it to decision
@@ -182,7 +283,6 @@ Be thorough, fair, and explainable. This decision impacts real people's housing.
                 decision["risk_score"] = risk_score
             else:
                 # Generate random risk score in 500-800 range for display
-                import random
                 decision["risk_score"] = random.randint(500, 800)
             
             # Mark that AI was actually used
@@ -197,7 +297,7 @@ Be thorough, fair, and explainable. This decision impacts real people's housing.
             )
             
             return decision
-            
+        
         except Exception as e:
             logger.error(f"Decision agent error: {str(e)}", exc_info=True)
             raise
@@ -225,62 +325,85 @@ Be thorough, fair, and explainable. This decision impacts real people's housing.
         Returns:
             Formatted prompt for Claude
         """
-        prompt = "# Tenant Screening Analysis\n\nMake a final decision based on:\n\n"
+        ing_data = ingestion.get("data", _EMPTY)
+        id_data = identity.get("data", _EMPTY)
+        fraud_data = fraud.get("data", _EMPTY)
+        risk_data = risk.get("data", _EMPTY)
+        comp_data = compliance.get("data", _EMPTY)
+        bias_data = bias.get("data", _EMPTY)
         
-        # Ingestion summary
-        ing_data = ingestion.get("data", {})
-        prompt += f"## Applicant Profile\n"
-        prompt += f"- Name: {ing_data.get('applicant_name', 'N/A')}\n"
-        prompt += f"- Income: ${ing_data.get('annual_income', 0):,.0f}\n"
-        prompt += f"- Employment: {ing_data.get('employment_status', 'N/A')}\n"
-        prompt += f"- Data Quality: {ing_data.get('quality_score', 0):.0%}\n\n"
+        sections = [_PROMPT_HEADER]
         
-        # Identity verification
-        id_data = identity.get("data", {})
-        prompt += f"## Identity Verification\n"
-        prompt += f"- Status: {id_data.get('verification_status', 'UNKNOWN')}\n"
-        prompt += f"- Confidence: {id_data.get('confidence_score', 0):.0%}\n"
-        issues = id_data.get('issues', [])
-        issues_str = ', '.join(str(i) for i in issues) if issues else 'None'
-        prompt += f"- Issues: {issues_str}\n\n"
+        if ing_data:
+            sections.append(_APPLICANT_SECTION.format(
+                applicant_name=ing_data.get("applicant_name", "N/A"),
+                annual_income=ing_data.get("annual_income", 0),
+                employment_status=ing_data.get("employment_status", "N/A"),
+                quality_score=ing_data.get("quality_score", 0)
+            ))
         
-        # Fraud detection
-        fraud_data = fraud.get("data", {})
-        prompt += f"## Fraud Analysis\n"
-        prompt += f"- Risk Level: {fraud_data.get('fraud_risk_level', 'UNKNOWN')}\n"
-        prompt += f"- Score: {fraud_data.get('fraud_score', 0):.0%}\n"
-        indicators = fraud_data.get('fraud_indicators', [])
-        indicators_str = ', '.join(str(i) for i in indicators) if indicators else 'None'
-        prompt += f"- Indicators: {indicators_str}\n\n"
+        if id_data:
+            issues = id_data.get("issues", [])
+            sections.append(_IDENTITY_SECTION.format(
+                verification_status=id_data.get("verification_status", "UNKNOWN"),
+                confidence=id_data.get("confidence_score", 0),
+                issues=", ".join(str(i) for i in issues) if issues else "None"
+            ))
         
-        # Risk scoring
-        risk_data = risk.get("data", {})
-        prompt += f"## Risk Assessment\n"
-        prompt += f"- Score: {risk_data.get('risk_score', 0)}/1000\n"
-        prompt += f"- Tier: {risk_data.get('risk_tier', 'UNKNOWN')}\n"
-        prompt += f"- Credit Score: {risk_data.get('credit_score', 0)}\n"
-        drivers = risk_data.get('key_risk_drivers', [])
-        drivers_str = ', '.join(str(d) for d in drivers) if drivers else 'None'
-        prompt += f"- Key Drivers: {drivers_str}\n\n"
+        if fraud_data:
+            indicators = fraud_data.get("fraud_indicators", [])
+            sections.append(_FRAUD_SECTION.format(
+                risk_level=fraud_data.get("fraud_risk_level", "UNKNOWN"),
+                fraud_score=fraud_data.get("fraud_score", 0),
+                indicators=", ".join(str(i) for i in indicators) if indicators else "None"
+            ))
         
-        # Compliance
-        comp_data = compliance.get("data", {})
-        prompt += f"## Compliance Check\n"
-        prompt += f"- Status: {comp_data.get('compliance_status', 'UNKNOWN')}\n"
-        prompt += f"- Fair Housing: {comp_data.get('fair_housing_compliant', False)}\n"
-        prompt += f"- FCRA: {comp_data.get('fcra_compliant', False)}\n"
-        prompt += f"- Violations: {', '.join(comp_data.get('violations', [])) or 'None'}\n\n"
+        if risk_data:
+            drivers = risk_data.get("key_risk_drivers", [])
+            sections.append(_RISK_SECTION.format(
+                risk_score=risk_data.get("risk_score", 0),
+                risk_tier=risk_data.get("risk_tier", "UNKNOWN"),
+                credit_score=risk_data.get("credit_score", 0),
+                drivers=", ".join(str(d) for d in drivers) if drivers else "None"
+            ))
         
-        # Bias detection
-        bias_data = bias.get("data", {})
-        prompt += f"## Bias Analysis\n"
-        prompt += f"- Bias Detected: {bias_data.get('bias_detected', False)}\n"
-        prompt += f"- Fairness Score: {bias_data.get('fairness_score', 100):.0%}\n"
-        prompt += f"- Issues: {', '.join(bias_data.get('bias_indicators', [])) or 'None'}\n\n"
+        if comp_data:
+            sections.append(_COMPLIANCE_SECTION.format(
+                compliance_status=comp_data.get("compliance_status", "UNKNOWN"),
+                fair_housing_compliant=comp_data.get("fair_housing_compliant", False),
+                fcra_compliant=comp_data.get("fcra_compliant", False),
+                violations=", ".join(comp_data.get("violations", [])) or "None"
+            ))
         
-        prompt += "**Now make your final decision using the framework provided.**"
+        if bias_data:
+            sections.append(_BIAS_SECTION.format(
+                bias_detected=bias_data.get("bias_detected", False),
+                fairness_score=bias_data.get("fairness_score", 100),
+                issues=", ".join(bias_data.get("bias_indicators", [])) or "None"
+            ))
         
-        return prompt
+        sections.append(_PROMPT_FOOTER)
+        return "".join(sections)
+    
+    async def _request_decision(self, user_prompt: str) -> Dict[str, Any]:
+        """
+        Ask Gemini for a decision and parse it.
+        
+        Args:
+            user_prompt: Decision prompt
+        
+        Returns:
+            Parsed decision
+        """
+        # Call Gemini for decision (bare JSON, so parsing takes the one-call path)
+        decision_raw = await self.call_llm(
+            user_prompt,
+            response_schema=self._response_schema,
+            semantic_threshold=self._semantic_threshold
+        )
+        
+        # Parse and validate decision
+        return self._parse_decision(decision_raw)
     
     def _parse_decision(self, raw_response: str) -> Dict[str, Any]:
         """
@@ -292,28 +415,13 @@ Be thorough, fair, and explainable. This decision impacts real people's housing.
         Returns:
             Structured decision object
         """
-        import json
+        # Validate JSON (including required fields) against the result model
+        decision = parse_result(DecisionResult, raw_response)
+        if decision is not None:
+            return decision
         
-        # Try to extract JSON from response
-        try:
-            # Look for JSON block
-            start = raw_response.find("{")
-            end = raw_response.rfind("}") + 1
-            
-            if start >= 0 and end > start:
-                json_str = raw_response[start:end]
-                decision = json.loads(json_str)
-                
-                # Validate required fields
-                required = ["decision", "confidence", "reasoning"]
-                if all(k in decision for k in required):
-                    return decision
-            
-            # Fallback: manual parsing
-            return self._manual_parse_decision(raw_response)
-            
-        except json.JSONDecodeError:
-            return self._manual_parse_decision(raw_response)
+        # Fallback: manual parsing
+        return self._manual_parse_decision(raw_response)
     
     def _manual_parse_decision(self, text: str) -> Dict[str, Any]:
         """
@@ -325,15 +433,15 @@ Be thorough, fair, and explainable. This decision impacts real people's housing.
         Returns:
             Best-effort decision structure
         """
-        text_upper = text.upper()
+        hits = _DECISION_SCANNER.find(text)
         
         # Determine decision
-        if "APPROVE" in text_upper and "DENY" not in text_upper:
-            if "CONDITIONAL" in text_upper:
+        if "APPROVE" in hits and "DENY" not in hits:
+            if "CONDITIONAL" in hits:
                 decision = "CONDITIONAL_APPROVE"
             else:
                 decision = "APPROVE"
-        elif "DENY" in text_upper:
+        elif "DENY" in hits:
             decision = "DENY"
         else:
             decision = "CONDITIONAL_APPROVE"  # Default to safe option
@@ -349,11 +457,12 @@ Be thorough, fair, and explainable. This decision impacts real people's housing.
         }
 
 
+@lru_cache(maxsize=1)
 def get_decision_agent() -> DecisionAIAgent:
     """
-    Factory function to get DecisionAIAgent instance.
+    Factory function to get the shared DecisionAIAgent instance.
     
     Returns:
-        Initialized DecisionAIAgent
+        Initialized DecisionAIAgent (created on first call)
     """
     return DecisionAIAgent()
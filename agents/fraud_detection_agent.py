@@ -5,9 +5,22 @@ Pattern-based fraud detection using rule-based heuristics.
 In production, would use XGBoost + SHAP for ML-based detection.
 """
 
+from functools import lru_cache
 from typing import Dict, Any, List
 from .base_ai_agent import BaseAIAgent
 
+# Simplified income expectations by job category
+_INCOME_EXPECTATIONS = {
+    "manager": (50000, 150000),
+    "engineer": (60000, 200000),
+    "director": (80000, 250000),
+    "analyst": (45000, 100000),
+    "assistant": (30000, 60000),
+    "consultant": (60000, 180000),
+    "developer": (60000, 180000),
+    "specialist": (45000, 90000)
+}
+
 
 class FraudDetectionAgent(BaseAIAgent):
     """
@@ -103,20 +116,8 @@ class FraudDetectionAgent(BaseAIAgent):
         # Check if income seems too high for job title
         job_title = employment.get("job_title", "").lower()
         
-        # Simplified income expectations by job category
-        income_expectations = {
-            "manager": (50000, 150000),
-            "engineer": (60000, 200000),
-            "director": (80000, 250000),
-            "analyst": (45000, 100000),
-            "assistant": (30000, 60000),
-            "consultant": (60000, 180000),
-            "developer": (60000, 180000),
-            "specialist": (45000, 90000)
-        }
-        
         # Check job title against income
-        for job_keyword, (min_income, max_income) in income_expectations.items():
+        for job_keyword, (min_income, max_income) in _INCOME_EXPECTATIONS.items():
             if job_keyword in job_title:
                 if annual_income < min_income * 0.5 or annual_income > max_income * 1.5:
                     return {
@@ -202,10 +203,10 @@ class FraudDetectionAgent(BaseAIAgent):
             }
         
         # All accounts opened recently (identity theft indicator)
+        # Stops at the first older account, the usual case
         accounts = credit_data.get("accounts", [])
-        if accounts:
-            recent_accounts = sum(1 for acc in accounts if acc.get("months_open", 999) < 12)
-            if recent_accounts == len(accounts) and len(accounts) >= 3:
+        if len(accounts) >= 3:
+            if all(acc.get("months_open", 999) < 12 for acc in accounts):
                 return {
                     "type": "all_recent_accounts",
                     "description": "All credit accounts opened within last year",
@@ -291,6 +292,7 @@ class FraudDetectionAgent(BaseAIAgent):
 
 
 # Export agent
+@lru_cache(maxsize=1)
 def get_fraud_detection_agent() -> FraudDetectionAgent:
     """Get singleton instance of FraudDetectionAgent."""
     return FraudDetectionAgent()
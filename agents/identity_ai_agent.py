@@ -4,12 +4,40 @@ Identity AI Agent.
 AI-powered identity verification using Claude for document analysis.
 """
 
+import os
 import logging
+from functools import lru_cache
 from typing import Dict, Any
 from .base_ai_agent import BaseAIAgent
+from .keyword_scan import KeywordScanner
+from .llm_cache import ResponseCache
+from .result_models import IdentityResult, parse_result
 
 logger = logging.getLogger(__name__)
 
+# Verification results are reused for re-screenings of the same applicant
+# details, but only for a day so identity checks stay current
+IDENTITY_CACHE_TTL_SECONDS = int(os.getenv("IDENTITY_CACHE_TTL_SECONDS", str(24 * 3600)))
+_VERIFICATION_CACHE_MAX_ENTRIES = 4096
+
+# Keywords the manual verification parser looks for (one scan per response)
+_IDENTITY_SCANNER = KeywordScanner((
+    "VERIFIED",
+    "LIKELY",
+    "FAILED",
+    "FRAUD",
+    "SSN",
+    "INVALID",
+    "ISSUE",
+    "AGE",
+    "18",
+    "SYNTHETIC"
+))
+
+# Static parts of the identity verification prompt
+_IDENTITY_PROMPT_HEADER = "# Identity Verification Request\n\nVerify the following applicant:\n\n"
+_IDENTITY_PROMPT_FOOTER = "**Perform comprehensive identity verification using the framework provided.**"
+
 
 class IdentityAIAgent(BaseAIAgent):
     """
@@ -19,23 +47,8 @@ class IdentityAIAgent(BaseAIAgent):
     and verify authenticity with reasoning-based confidence scoring.
     """
     
-    def __init__(self):
-        """Initialize IdentityAIAgent."""
-        super().__init__(
-            agent_name="IdentityAIAgent",
-            model="gemini-2.5-flash",
-            max_tokens=2500,
-            temperature=0.2  # Low temperature for consistent verification
-        )
-    
-    def _get_system_prompt(self) -> str:
-        """
-        System prompt for identity verification.
-        
-        Returns:
-            Specialized prompt for identity analysis
-        """
-        return """You are an expert identity verification agent for Equifax.
+    # Static verification guide, sent as the model's system instruction
+    _SYSTEM_PROMPT = """You are an expert identity verification agent for Equifax.
 
 Your role is to analyze applicant identity information and detect potential fraud or inconsistencies.
 
@@ -83,6 +96,31 @@ Your role is to analyze applicant identity information and detect potential frau
 }
 
 Be thorough and flag any suspicious patterns."""
+
+    def __init__(self):
+        """Initialize IdentityAIAgent."""
+        super().__init__(
+            agent_name="IdentityAIAgent",
+            model="gemini-2.5-flash",
+            max_tokens=2500,
+            temperature=0.2  # Low temperature for consistent verification
+        )
+        
+        # Prompt digest -> parsed verification (the prompt holds every
+        # applicant detail the verification depends on)
+        self._verification_cache = ResponseCache(
+            max_entries=_VERIFICATION_CACHE_MAX_ENTRIES,
+            ttl_seconds=IDENTITY_CACHE_TTL_SECONDS
+        )
+    
+    def _get_system_prompt(self) -> str:
+        """
+        System prompt for identity verification.
+        
+        Returns:
+            Specialized prompt for identity analysis
+        """
+        return self._SYSTEM_PROMPT
     
     async def _run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -101,11 +139,13 @@ Be thorough and flag any suspicious patterns."""
             # Build verification prompt
             user_prompt = self._build_verification_prompt(applicant)
             
-            # Call Claude for analysis
-            verification_raw = await self.call_llm(user_prompt)
-            
-            # Parse and validate results
-            verification = self._parse_verification(verification_raw)
+            verification, cache_hit = await self._cached_parse(
+                self._verification_cache,
+                user_prompt,
+                lambda: self._request_verification(user_prompt)
+            )
+            if cache_hit:
+                logger.info("Identity verification served from verification cache")
             
             # Log results
             logger.info(
@@ -114,11 +154,32 @@ Be thorough and flag any suspicious patterns."""
             )
             
             return verification
-            
+        
         except Exception as e:
             logger.error(f"Identity verification error: {str(e)}", exc_info=True)
             raise
     
+    async def _request_verification(self, user_prompt: str) -> Dict[str, Any]:
+        """
+        Ask Gemini for an identity verification and parse it.
+        
+        Args:
+            user_prompt: Verification prompt
+        
+        Returns:
+            Parsed verification results
+        """
+        # The shared response caches are bypassed: their TTL is longer
+        # than the verification cache's, and a paraphrase match would
+        # hand back another applicant's verification. Streamed, so
+        # generation stops at the end of the JSON verification
+        verification_raw = await self.call_llm(
+            user_prompt,
+            cache_enabled=False,
+            stop_after_json=True
+        )
+        return self._parse_verification(verification_raw)
+    
     def _build_verification_prompt(self, applicant: Dict[str, Any]) -> str:
         """
         Build identity verification prompt.
@@ -129,33 +190,38 @@ Be thorough and flag any suspicious patterns."""
         Returns:
             Formatted prompt for Claude
         """
-        prompt = "# Identity Verification Request\n\nVerify the following applicant:\n\n"
+        address = applicant.get('current_address', {})
         
-        # Personal information
-        prompt += f"**Name:** {applicant.get('first_name', '')} {applicant.get('last_name', '')}\n"
-        prompt += f"**SSN:** {applicant.get('ssn', 'Not provided')}\n"
-        prompt += f"**Date of Birth:** {applicant.get('date_of_birth', 'Not provided')}\n"
-        prompt += f"**Email:** {applicant.get('email', 'Not provided')}\n"
-        prompt += f"**Phone:** {applicant.get('phone', 'Not provided')}\n\n"
+        parts = [
+            _IDENTITY_PROMPT_HEADER,
+            # Personal information
+            f"**Name:** {applicant.get('first_name', '')} {applicant.get('last_name', '')}\n",
+            f"**SSN:** {applicant.get('ssn', 'Not provided')}\n",
+            f"**Date of Birth:** {applicant.get('date_of_birth', 'Not provided')}\n",
+            f"**Email:** {applicant.get('email', 'Not provided')}\n",
+            f"**Phone:** {applicant.get('phone', 'Not provided')}\n\n"
+        ]
         
         # Address
-        address = applicant.get('current_address', {})
         if address:
-            prompt += f"**Current Address:**\n"
-            prompt += f"- Street: {address.get('street', 'N/A')}\n"
-            prompt += f"- City: {address.get('city', 'N/A')}\n"
-            prompt += f"- State: {address.get('state', 'N/A')}\n"
-            prompt += f"- ZIP: {address.get('zip', 'N/A')}\n\n"
+            parts.append(
+                f"**Current Address:**\n"
+                f"- Street: {address.get('street', 'N/A')}\n"
+                f"- City: {address.get('city', 'N/A')}\n"
+                f"- State: {address.get('state', 'N/A')}\n"
+                f"- ZIP: {address.get('zip', 'N/A')}\n\n"
+            )
         
         # Additional context
         if 'employment' in applicant:
             emp = applicant['employment']
-            prompt += f"**Employment:** {emp.get('employer_name', 'N/A')}\n"
-            prompt += f"**Job Title:** {emp.get('job_title', 'N/A')}\n\n"
-        
-        prompt += "**Perform comprehensive identity verification using the framework provided.**"
+            parts.append(
+                f"**Employment:** {emp.get('employer_name', 'N/A')}\n"
+                f"**Job Title:** {emp.get('job_title', 'N/A')}\n\n"
+            )
         
-        return prompt
+        parts.append(_IDENTITY_PROMPT_FOOTER)
+        return "".join(parts)
     
     def _parse_verification(self, raw_response: str) -> Dict[str, Any]:
         """
@@ -167,26 +233,12 @@ Be thorough and flag any suspicious patterns."""
         Returns:
             Structured verification result
         """
-        import json
+        verification = parse_result(IdentityResult, raw_response)
+        if verification is not None:
+            return verification
         
-        try:
-            # Extract JSON
-            start = raw_response.find("{")
-            end = raw_response.rfind("}") + 1
-            
-            if start >= 0 and end > start:
-                json_str = raw_response[start:end]
-                verification = json.loads(json_str)
-                
-                # Validate required fields
-                if "verification_status" in verification:
-                    return verification
-            
-            # Fallback parsing
-            return self._manual_parse_verification(raw_response)
-            
-        except json.JSONDecodeError:
-            return self._manual_parse_verification(raw_response)
+        # Fallback parsing
+        return self._manual_parse_verification(raw_response)
     
     def _manual_parse_verification(self, text: str) -> Dict[str, Any]:
         """
@@ -198,17 +250,17 @@ Be thorough and flag any suspicious patterns."""
         Returns:
             Best-effort verification structure
         """
-        text_upper = text.upper()
+        hits = _IDENTITY_SCANNER.find(text)
         
         # Determine status
-        if "VERIFIED" in text_upper:
-            if "LIKELY" in text_upper:
+        if "VERIFIED" in hits:
+            if "LIKELY" in hits:
                 status = "LIKELY_VERIFIED"
                 confidence = 0.80
             else:
                 status = "VERIFIED"
                 confidence = 0.95
-        elif "FAILED" in text_upper or "FRAUD" in text_upper:
+        elif "FAILED" in hits or "FRAUD" in hits:
             status = "FAILED"
             confidence = 0.30
         else:
@@ -217,11 +269,11 @@ Be thorough and flag any suspicious patterns."""
         
         # Look for issues
         issues = []
-        if "SSN" in text_upper and ("INVALID" in text_upper or "ISSUE" in text_upper):
+        if "SSN" in hits and ("INVALID" in hits or "ISSUE" in hits):
             issues.append("SSN validation issue")
-        if "AGE" in text_upper and "18" in text:
+        if "AGE" in hits and "18" in hits:
             issues.append("Age verification needed")
-        if "SYNTHETIC" in text_upper:
+        if "SYNTHETIC" in hits:
             issues.append("Possible synthetic identity")
         
         return {
@@ -241,11 +293,12 @@ Be thorough and flag any suspicious patterns."""
         }
 
 
+@lru_cache(maxsize=1)
 def get_identity_agent() -> IdentityAIAgent:
     """
-    Factory function to get IdentityAIAgent instance.
+    Factory function to get the shared IdentityAIAgent instance.
     
     Returns:
-        Initialized IdentityAIAgent
+        Initialized IdentityAIAgent (created on first call)
     """
     return IdentityAIAgent()
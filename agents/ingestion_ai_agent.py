@@ -5,10 +5,20 @@ Uses Claude Sonnet 4.5 to intelligently parse and extract structured data
 from tenant applications (PDFs, images, JSON, forms).
 """
 
+import re
 import json
+from functools import lru_cache
 from typing import Dict, Any, List
 from .base_ai_agent import BaseAIAgent
 
+# Sections a pre-structured application must have
+_REQUIRED_SECTIONS = frozenset(("applicant", "employment", "rental_history"))
+
+# Values already in normalized form are passed through unchanged
+_PHONE_FORMAT = re.compile(r"\(\d{3}\) \d{3}-\d{4}", re.ASCII)
+_SSN_FORMAT = re.compile(r"\d{3}-\d{2}-\d{4}", re.ASCII)
+_NON_DIGITS = re.compile(r"\D+")
+
 
 class IngestionAIAgent(BaseAIAgent):
     """
@@ -21,6 +31,55 @@ class IngestionAIAgent(BaseAIAgent):
     - Validate and normalize data
     """
     
+    # Static extraction schema, sent as the model's system instruction
+    _SYSTEM_PROMPT = """
+You are an expert data extraction AI for tenant screening applications.
+
+Your task is to analyze raw application data and extract a structured profile.
+
+Output must be valid JSON with this exact structure:
+{
+  "applicant": {
+    "first_name": "string",
+    "last_name": "string",
+    "email": "string",
+    "phone": "string",
+    "ssn": "string (XXX-XX-XXXX format)",
+    "date_of_birth": "YYYY-MM-DD",
+    "current_address": {
+      "street": "string",
+      "city": "string",
+      "state": "string",
+      "zip": "string"
+    }
+  },
+  "employment": {
+    "employer_name": "string",
+    "job_title": "string",
+    "employment_status": "full-time | part-time | self-employed | unemployed",
+    "annual_income": number,
+    "years_employed": number,
+    "employer_phone": "string"
+  },
+  "rental_history": {
+    "current_landlord": "string",
+    "current_landlord_phone": "string",
+    "monthly_rent": number,
+    "years_at_current": number,
+    "reason_for_leaving": "string"
+  },
+  "additional_info": {
+    "pets": boolean,
+    "smoker": boolean,
+    "bankruptcy_history": boolean,
+    "eviction_history": boolean
+  }
+}
+
+If information is missing, use null for the field.
+Be precise and extract all available information.
+"""
+    
     def __init__(self):
         super().__init__(
             agent_name="IngestionAIAgent",
@@ -54,8 +113,7 @@ class IngestionAIAgent(BaseAIAgent):
     
     def _is_structured(self, data: Dict[str, Any]) -> bool:
         """Check if application is already in structured format."""
-        required_fields = ["applicant", "employment", "rental_history"]
-        return all(field in data for field in required_fields)
+        return _REQUIRED_SECTIONS.issubset(data)
     
     def _validate_and_normalize(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and normalize structured data."""
@@ -85,64 +143,16 @@ class IngestionAIAgent(BaseAIAgent):
     async def _extract_with_claude(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Use Claude to extract structured data from raw input."""
         
-        system_prompt = """
-You are an expert data extraction AI for tenant screening applications.
-
-Your task is to analyze raw application data and extract a structured profile.
-
-Output must be valid JSON with this exact structure:
-{
-  "applicant": {
-    "first_name": "string",
-    "last_name": "string",
-    "email": "string",
-    "phone": "string",
-    "ssn": "string (XXX-XX-XXXX format)",
-    "date_of_birth": "YYYY-MM-DD",
-    "current_address": {
-      "street": "string",
-      "city": "string",
-      "state": "string",
-      "zip": "string"
-    }
-  },
-  "employment": {
-    "employer_name": "string",
-    "job_title": "string",
-    "employment_status": "full-time | part-time | self-employed | unemployed",
-    "annual_income": number,
-    "years_employed": number,
-    "employer_phone": "string"
-  },
-  "rental_history": {
-    "current_landlord": "string",
-    "current_landlord_phone": "string",
-    "monthly_rent": number,
-    "years_at_current": number,
-    "reason_for_leaving": "string"
-  },
-  "additional_info": {
-    "pets": boolean,
-    "smoker": boolean,
-    "bankruptcy_history": boolean,
-    "eviction_history": boolean
-  }
-}
-
-If information is missing, use null for the field.
-Be precise and extract all available information.
-"""
-        
         user_prompt = f"""
 Extract structured tenant application data from this raw input:
 
-{json.dumps(raw_data, indent=2)}
+{json.dumps(raw_data, separators=(",", ":"))}
 
 Return valid JSON only (no markdown, no explanation).
 """
         
         extracted_data = await self.call_claude_with_json_response(
-            system_prompt=system_prompt,
+            system_prompt=self._SYSTEM_PROMPT,
             user_prompt=user_prompt
         )
         
@@ -151,8 +161,11 @@ Return valid JSON only (no markdown, no explanation).
     
     def _normalize_phone(self, phone: str) -> str:
         """Normalize phone number to (XXX) XXX-XXXX format."""
+        if isinstance(phone, str) and _PHONE_FORMAT.fullmatch(phone):
+            return phone
+        
         # Remove all non-digits
-        digits = ''.join(c for c in str(phone) if c.isdigit())
+        digits = _NON_DIGITS.sub('', str(phone))
         
         if len(digits) == 10:
             return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
@@ -160,8 +173,11 @@ Return valid JSON only (no markdown, no explanation).
     
     def _normalize_ssn(self, ssn: str) -> str:
         """Normalize SSN to XXX-XX-XXXX format."""
+        if isinstance(ssn, str) and _SSN_FORMAT.fullmatch(ssn):
+            return ssn
+        
         # Remove all non-digits
-        digits = ''.join(c for c in str(ssn) if c.isdigit())
+        digits = _NON_DIGITS.sub('', str(ssn))
         
         if len(digits) == 9:
             return f"{digits[:3]}-{digits[3:5]}-{digits[5:]}"
@@ -169,6 +185,7 @@ Return valid JSON only (no markdown, no explanation).
 
 
 # Export agent
+@lru_cache(maxsize=1)
 def get_ingestion_agent() -> IngestionAIAgent:
     """Get singleton instance of IngestionAIAgent."""
     return IngestionAIAgent()
@@ -0,0 +1,88 @@
+"""
+Keyword Scan.
+
+Single-pass multi-keyword search used by the agents' manual (non-JSON)
+response parsers. Finds every keyword present in a text in one traversal
+instead of one substring scan per keyword.
+"""
+
+import re
+import logging
+from typing import Iterable, Set
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+logger = logging.getLogger(__name__)
+
+# Characters of text upper-cased at a time for the automaton, so a large
+# response is never copied whole
+_WINDOW_CHARS = 1 << 16
+
+
+class KeywordScanner:
+    """
+    Finds which of a fixed set of keywords occur in a text.
+    
+    Uses a pyahocorasick automaton, or a regex lookahead alternation when
+    pyahocorasick is missing (both single pass, in compiled code). Matching
+    is case-insensitive substring matching, so keywords must be upper-case
+    ASCII. The automaton scans upper-cased windows of the text (overlapping
+    by the longest keyword length minus one, so no match is split); the
+    regex folds case as it scans.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Build the scanner.
+        
+        Args:
+            keywords: Upper-case ASCII keywords
+        """
+        self.keywords = tuple(keywords)
+        
+        if HAS_AHOCORASICK:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+            self._overlap = max(map(len, self.keywords), default=1) - 1
+        else:
+            # Lookahead alternation reports overlapping matches at distinct
+            # offsets; longest first, so a keyword only hides its own prefixes
+            alternatives = sorted(self.keywords, key=len, reverse=True)
+            self._pattern = re.compile(
+                "(?=(" + "|".join(map(re.escape, alternatives)) + "))", re.IGNORECASE
+            )
+            self._implied = {
+                keyword: {other for other in self.keywords if other != keyword and other in keyword}
+                for keyword in self.keywords
+            }
+    
+    def find(self, text: str) -> Set[str]:
+        """
+        Return the keywords present in text, ignoring case.
+        
+        Args:
+            text: Text to scan
+        
+        Returns:
+            Set of keywords found
+        """
+        if HAS_AHOCORASICK:
+            found: Set[str] = set()
+            step = _WINDOW_CHARS - self._overlap
+            for start in range(0, max(len(text) - self._overlap, 1), step):
+                window = text[start:start + _WINDOW_CHARS].upper()
+                found.update(keyword for _, keyword in self._automaton.iter(window))
+                if len(found) == len(self.keywords):
+                    break
+            return found
+        
+        hits = {match.upper() for match in self._pattern.findall(text)}
+        for keyword in tuple(hits):
+            hits |= self._implied[keyword]
+        return hits
@@ -0,0 +1,189 @@
+"""
+LLM Batch Prediction.
+
+Routes Gemini calls made during an offline screening run through a single
+Vertex AI batch prediction job instead of one real-time request each.
+Batch jobs are billed at a discount and have separate (higher) quotas, at
+the cost of minutes-to-hours latency, so they are only used for
+non-interactive work.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Batch settings (batch mode is disabled unless a GCS staging location is set)
+GEMINI_BATCH_GCS_URI = os.getenv("GEMINI_BATCH_GCS_URI", "").rstrip("/")
+GEMINI_BATCH_POLL_SECONDS = int(os.getenv("GEMINI_BATCH_POLL_SECONDS", "30"))
+GEMINI_BATCH_COLLECT_MS = int(os.getenv("GEMINI_BATCH_COLLECT_MS", "200"))
+
+# Request label carrying each line's index in the job, echoed back in its output line
+_BATCH_ID_LABEL = "batch_request_id"
+
+# Collector for the batch run the current task belongs to (None when interactive)
+active_batch: ContextVar[Optional["BatchCollector"]] = ContextVar("active_batch", default=None)
+
+
+def _split_gcs_uri(uri: str) -> Tuple[str, str]:
+    """Split gs://bucket/path into (bucket, path)."""
+    bucket, _, path = uri[len("gs://"):].partition("/")
+    return bucket, path
+
+
+def _response_text(line: Dict[str, Any]) -> Optional[str]:
+    """Extract the generated text from one batch output line."""
+    try:
+        parts = line["response"]["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return "".join(part.get("text", "") for part in parts)
+
+
+def run_batch_prediction(model: str, requests: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """
+    Submit a Gemini batch prediction job and wait for it to finish.
+    
+    Blocking; call from a worker thread.
+    
+    Args:
+        model: Gemini model name
+        requests: GenerateContent request bodies
+    
+    Returns:
+        Response text per request, in input order (None where the job
+        returned no candidate)
+    """
+    from google.cloud import storage
+    from vertexai.batch_prediction import BatchPredictionJob
+    
+    run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    bucket_name, prefix = _split_gcs_uri(GEMINI_BATCH_GCS_URI)
+    base_path = f"{prefix}/{run_id}" if prefix else run_id
+    
+    client = storage.Client()
+    bucket = client.bucket(bucket_name)
+    
+    # Stage input JSONL, tagging each request with its index so output lines
+    # (which come back in no particular order) can be matched to it
+    input_blob = bucket.blob(f"{base_path}/input.jsonl")
+    input_blob.upload_from_string(
+        "\n".join(
+            json.dumps({"request": {**request, "labels": {_BATCH_ID_LABEL: str(index)}}})
+            for index, request in enumerate(requests)
+        ),
+        content_type="application/jsonl"
+    )
+    
+    job = BatchPredictionJob.submit(
+        source_model=model,
+        input_dataset=f"gs://{bucket_name}/{input_blob.name}",
+        output_uri_prefix=f"gs://{bucket_name}/{base_path}/output"
+    )
+    logger.info(f"Submitted Gemini batch job {job.resource_name} ({len(requests)} requests)")
+    
+    while not job.has_ended:
+        time.sleep(GEMINI_BATCH_POLL_SECONDS)
+        job.refresh()
+    
+    if not job.has_succeeded:
+        raise RuntimeError(f"Gemini batch job {job.resource_name} failed: {job.error}")
+    
+    results: List[Optional[str]] = [None] * len(requests)
+    _, output_prefix = _split_gcs_uri(job.output_location)
+    for blob in client.list_blobs(bucket_name, prefix=output_prefix):
+        if not blob.name.endswith(".jsonl"):
+            continue
+        for raw in blob.download_as_text().splitlines():
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            try:
+                index = int(line["request"]["labels"][_BATCH_ID_LABEL])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= index < len(requests):
+                results[index] = _response_text(line)
+    
+    logger.info(f"Gemini batch job {job.resource_name} completed")
+    return results
+
+
+class BatchCollector:
+    """
+    Gathers Gemini requests from concurrently running agent tasks.
+    
+    Each call parks on a future; flush() submits everything pending as
+    one batch prediction job and resolves the futures with its output.
+    """
+    
+    def __init__(self, model: str):
+        """
+        Initialize collector.
+        
+        Args:
+            model: Gemini model the batch job runs on
+        """
+        self.model = model
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def submit(
+        self,
+        system_prompt: str,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool = False,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> asyncio.Future:
+        """Queue a request; the returned future resolves to the response text."""
+        generation_config: Dict[str, Any] = {
+            "maxOutputTokens": max_tokens,
+            "temperature": temperature
+        }
+        if json_mode:
+            generation_config["responseMimeType"] = "application/json"
+        if response_schema is not None:
+            generation_config["responseSchema"] = response_schema
+        
+        request = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "systemInstruction": {"parts": [{"text": system_prompt}]},
+            "generationConfig": generation_config
+        }
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((request, future))
+        return future
+    
+    async def flush(self) -> None:
+        """Run all pending requests as one batch job."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        
+        try:
+            results = await asyncio.to_thread(
+                run_batch_prediction, self.model, [request for request, _ in pending]
+            )
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), text in zip(pending, results):
+            if future.done():
+                continue
+            if text is None:
+                future.set_exception(RuntimeError("Gemini batch job returned no response for request"))
+            else:
+                future.set_result(text)
@@ -0,0 +1,260 @@
+"""
+LLM Response Cache.
+
+In-process caches that let agents skip Gemini round-trips for prompts
+they have already answered.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+# Cache settings
+ENABLE_CACHING = os.getenv("ENABLE_CACHING", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+
+# Semantic cache settings (opt-in: a hit reuses an answer to a *similar* prompt)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# Vertex AI context caching of system instructions (opt-in: cached content is
+# billed for storage and needs a prompt above the model's minimum token count)
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() == "true"
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+
+# Responses sampled above this temperature are not reproducible, never cache them
+MAX_CACHEABLE_TEMPERATURE = 0.3
+
+
+@lru_cache(maxsize=64)
+def _prefix_digest(model: str, system_prompt: str) -> bytes:
+    """Digest of the static part of a request (model and system prompt)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (model, system_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.digest()
+
+
+def make_cache_key(
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    system_prompt: str,
+    user_prompt: str
+) -> str:
+    """
+    Build a deterministic key for an LLM request.
+    
+    The system prompt is digested once per (model, prompt) and reused, so
+    each call only hashes the sampling params and the user prompt.
+    
+    Returns:
+        BLAKE2b hex digest of the model, sampling params and prompts
+    """
+    digest = hashlib.blake2b(_prefix_digest(model, system_prompt), digest_size=32)
+    digest.update(f"{temperature!r}\x00{max_tokens!r}\x00".encode("utf-8"))
+    digest.update(user_prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match LRU cache with per-entry TTL.
+    
+    Not thread-safe; intended for use from a single event loop.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            max_entries: Maximum cached responses before LRU eviction
+            ttl_seconds: Time-to-live for each entry
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return cached response, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: str, value: str) -> None:
+        """Store response, evicting the least recently used entry when full."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache for paraphrased prompts.
+    
+    Prompts are embedded with a local sentence-transformers model and
+    compared by cosine similarity against prior prompts in the same
+    namespace (one per agent and system prompt). Each namespace is a
+    fixed-size ring buffer searched by brute force, which is fast enough
+    at the configured sizes and avoids a vector database dependency.
+    Entries expire after ttl_seconds so reused answers stay fresh.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = SEMANTIC_CACHE_MODEL,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = SEMANTIC_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            model_name: sentence-transformers model used for embeddings
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum entries per namespace
+            ttl_seconds: Entry time-to-live
+        """
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._encoder = None
+        self._available: Optional[bool] = None
+        self._namespaces: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _load_encoder(self) -> bool:
+        """Load the embedding model on first use."""
+        if self._available is None:
+            if not HAS_NUMPY:
+                self._available = False
+                logger.warning("numpy not available - semantic cache disabled")
+                return False
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.model_name)
+                self._available = True
+                logger.info(f"Semantic cache using embedding model {self.model_name}")
+            except Exception as e:
+                self._available = False
+                logger.warning(f"Semantic cache disabled - embedding model unavailable: {e}")
+        return self._available
+    
+    def embed(self, text: str) -> Optional["np.ndarray"]:
+        """Return the unit-normalized embedding for text, or None if unavailable."""
+        if not self._load_encoder():
+            return None
+        return self._encoder.encode(text, normalize_embeddings=True).astype(np.float32)
+    
+    def lookup(
+        self,
+        namespace: Hashable,
+        embedding: "np.ndarray",
+        threshold: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Return the response for the most similar live prompt above threshold.
+        
+        Args:
+            namespace: Cache namespace
+            embedding: Unit-normalized prompt embedding
+            threshold: Minimum cosine similarity (default: the cache's own)
+        """
+        if threshold is None:
+            threshold = self.threshold
+        
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or ns["count"] == 0:
+                self.misses += 1
+                return None
+            
+            count = ns["count"]
+            similarities = ns["vectors"][:count] @ embedding
+            similarities[ns["expires"][:count] < time.monotonic()] = -1.0
+            best = int(similarities.argmax())
+            if similarities[best] < threshold:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            return ns["responses"][best]
+    
+    def add(self, namespace: Hashable, embedding: "np.ndarray", response: str) -> None:
+        """Store a response, overwriting the oldest entry when the namespace is full."""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                ns = {
+                    "vectors": np.zeros((self.max_entries, embedding.shape[0]), dtype=np.float32),
+                    "responses": [None] * self.max_entries,
+                    "expires": np.zeros(self.max_entries, dtype=np.float64),
+                    "count": 0,
+                    "next": 0
+                }
+                self._namespaces[namespace] = ns
+            
+            slot = ns["next"]
+            ns["vectors"][slot] = embedding
+            ns["responses"][slot] = response
+            ns["expires"][slot] = time.monotonic() + self.ttl_seconds
+            ns["next"] = (slot + 1) % self.max_entries
+            ns["count"] = min(ns["count"] + 1, self.max_entries)
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._namespaces.clear()
+
+
+# Shared across all agents in the process
+response_cache = ResponseCache()
+semantic_cache = SemanticCache()
@@ -0,0 +1,156 @@
+"""
+LLM Retry Policy.
+
+Retry with exponential backoff for transient Vertex AI errors, and a
+per-model circuit breaker that stops calling Gemini during an outage.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    HAS_API_CORE = True
+except ImportError:
+    HAS_API_CORE = False
+
+logger = logging.getLogger(__name__)
+
+# Retry settings
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_RETRY_BASE_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "1.0"))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "30.0"))
+
+# Circuit breaker settings
+GEMINI_BREAKER_FAIL_MAX = int(os.getenv("GEMINI_BREAKER_FAIL_MAX", "5"))
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "60"))
+
+if HAS_API_CORE:
+    _TRANSIENT_ERRORS = (
+        google_exceptions.ResourceExhausted,    # 429
+        google_exceptions.ServiceUnavailable,   # 503
+        google_exceptions.DeadlineExceeded,     # 504
+        google_exceptions.InternalServerError,  # 500
+        asyncio.TimeoutError,
+        ConnectionError
+    )
+else:
+    _TRANSIENT_ERRORS = (asyncio.TimeoutError, ConnectionError)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gemini while its circuit breaker is open."""
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an error is worth retrying (throttling, overload, timeouts)."""
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Delay before retry number attempt (0-based).
+    
+    Exponential backoff with jitter, capped at GEMINI_RETRY_MAX_SECONDS.
+    """
+    delay = min(GEMINI_RETRY_MAX_SECONDS, GEMINI_RETRY_BASE_SECONDS * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    
+    Closed: calls pass through. After fail_max consecutive failures the
+    circuit opens and calls are refused for reset_seconds; then a single
+    trial call is let through (half-open), which closes the circuit on
+    success or reopens it on failure.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        fail_max: int = GEMINI_BREAKER_FAIL_MAX,
+        reset_seconds: float = GEMINI_BREAKER_RESET_SECONDS
+    ):
+        """
+        Initialize breaker.
+        
+        Args:
+            name: Name used in log messages
+            fail_max: Consecutive failures that open the circuit
+            reset_seconds: How long the circuit stays open
+        """
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half-open."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_seconds:
+            return "open"
+        return "half-open"
+    
+    def allow(self) -> bool:
+        """Whether a call may go through now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            # One trial at a time; a trial that never reported back (e.g.
+            # cancelled) is given up on after another reset period
+            now = time.monotonic()
+            if state == "half-open" and (
+                self._trial_started_at is None
+                or now - self._trial_started_at >= self.reset_seconds
+            ):
+                self._trial_started_at = now
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit for {self.name} closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started_at = None
+    
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            self._trial_started_at = None
+            if self._opened_at is not None or self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    f"Circuit for {self.name} opened after {self._failures} failures, "
+                    f"pausing calls for {self.reset_seconds:.0f}s"
+                )
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    """Get the circuit breaker shared by all agents calling model."""
+    with _breakers_lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(model)
+            _breakers[model] = breaker
+        return breaker
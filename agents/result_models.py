@@ -0,0 +1,142 @@
+"""
+Agent Result Models.
+
+Pydantic models for the JSON that LLM-backed agents ask Gemini to return.
+Validation runs in pydantic-core's compiled validators, parsing and
+type-checking a response in one pass. Required fields match what each
+agent needs before it trusts a response over its manual text parser;
+anything else the model returns is kept as-is. Optional fields accept the
+loose output the agents' dict-based parsing always took (null, unquoted
+numbers, a bare string for a list, non-string list items).
+"""
+
+import json
+from typing import Annotated, Any, Dict, List, Optional, Type, Union
+
+from pydantic import (
+    BaseModel,
+    BeforeValidator,
+    ConfigDict,
+    ValidationError,
+    ValidationInfo,
+    field_validator
+)
+
+from .base_ai_agent import extract_json_object
+
+
+def _as_text(value: Any) -> Any:
+    """Numbers and booleans as text (Gemini sometimes drops the quotes)."""
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def _as_text_list(value: Any) -> Any:
+    """A bare string as a one-item list, and list items as text (nulls dropped)."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [
+            item if isinstance(item, str)
+            else json.dumps(item) if isinstance(item, (dict, list))
+            else str(item)
+            for item in value if item is not None
+        ]
+    return value
+
+
+Text = Annotated[str, BeforeValidator(_as_text)]
+TextList = Annotated[List[str], BeforeValidator(_as_text_list)]
+
+
+class AgentResult(BaseModel):
+    """Base for LLM agent results (extra fields are preserved)."""
+    model_config = ConfigDict(extra="allow")
+    
+    @field_validator("*", mode="before")
+    @classmethod
+    def _null_as_default(cls, value: Any, info: ValidationInfo) -> Any:
+        """Treat null in a field that has a default as the field being left out."""
+        if value is None:
+            field = cls.model_fields[info.field_name]
+            if not field.is_required():
+                return field.get_default(call_default_factory=True)
+        return value
+
+
+class BiasResult(AgentResult):
+    """BiasAIAgent response."""
+    bias_detected: bool
+    fairness_score: float = 1.0
+    bias_indicators: TextList = []
+    protected_classes_affected: TextList = []
+    bias_type: Text = "NONE"
+    risk_level: Text = "LOW"
+    mitigation_strategies: TextList = []
+    recommendation: Text = ""
+
+
+class ComplianceResult(AgentResult):
+    """ComplianceAIAgent response."""
+    compliance_status: Text
+    fcra_compliant: bool = True
+    fair_housing_compliant: bool = True
+    state_law_compliant: bool = True
+    violations: TextList = []
+    risk_level: Text = "LOW"
+    required_actions: TextList = []
+    adverse_action_required: bool = False
+    recommendation: Text = ""
+
+
+class IdentityResult(AgentResult):
+    """IdentityAIAgent response."""
+    verification_status: Text
+    confidence_score: float = 0.0
+    identity_confirmed: bool = False
+    checks_performed: Dict[str, bool] = {}
+    issues: TextList = []
+    fraud_indicators: TextList = []
+    recommendation: Text = ""
+
+
+class DecisionResult(AgentResult):
+    """DecisionAIAgent response."""
+    decision: Text
+    confidence: Union[int, float]
+    reasoning: Text
+    key_factors: TextList = []
+    risk_mitigation: Optional[TextList] = None
+    conditions: Optional[TextList] = None
+    fair_housing_compliant: bool = True
+
+
+def parse_result(model: Type[AgentResult], raw_response: str) -> Optional[Dict[str, Any]]:
+    """
+    Validate an LLM response against a result model.
+    
+    The response is validated directly as JSON first (JSON mode output);
+    if that fails, the first JSON object embedded in the text is tried.
+    
+    Args:
+        model: Result model class
+        raw_response: Raw response text
+    
+    Returns:
+        Validated result as a dict of the fields present in the response,
+        or None if the response does not satisfy the model
+    """
+    try:
+        return model.model_validate_json(raw_response).model_dump(exclude_unset=True)
+    except ValidationError:
+        pass
+    
+    # The whole text already failed above, only look for an embedded object
+    embedded = extract_json_object(raw_response, try_whole=False)
+    if embedded is None:
+        return None
+    try:
+        return model.model_validate(embedded).model_dump(exclude_unset=True)
+    except ValidationError:
+        return None
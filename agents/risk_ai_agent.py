@@ -5,7 +5,9 @@ Combines Explainable Boosting Machine (EBM) with Claude reasoning
 for transparent, explainable risk scoring.
 """
 
+import os
 import json
+from functools import lru_cache
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -26,6 +28,10 @@ try:
 except ImportError:
     HAS_NUMPY = False
 
+# Low-risk results with no negative factors get the templated explanation
+# instead of an LLM call
+RISK_EXPLANATION_FAST_PATH = os.getenv("RISK_EXPLANATION_FAST_PATH", "true").lower() == "true"
+
 
 class RiskAIAgent(BaseAIAgent):
     """
@@ -37,6 +43,21 @@ class RiskAIAgent(BaseAIAgent):
     3. Output: risk_score (0-1000) + tier + AI reasoning
     """
     
+    # Static explanation guidelines, sent as the model's system instruction
+    _SYSTEM_PROMPT = """
+You are an expert risk analyst for tenant screening.
+
+Your task is to explain a risk assessment in clear, professional language.
+
+Guidelines:
+- Be concise (2-3 paragraphs maximum)
+- Explain the key risk factors
+- Use professional but accessible language
+- Highlight both strengths and concerns
+- Provide context for the risk tier
+- Do NOT include the numerical score (already shown separately)
+"""
+    
     def __init__(self):
         super().__init__(
             agent_name="RiskAIAgent",
@@ -347,19 +368,11 @@ class RiskAIAgent(BaseAIAgent):
         if not self.has_llm:
             return self._generate_fallback_explanation(risk_result)
         
-        system_prompt = """
-You are an expert risk analyst for tenant screening.
-
-Your task is to explain a risk assessment in clear, professional language.
-
-Guidelines:
-- Be concise (2-3 paragraphs maximum)
-- Explain the key risk factors
-- Use professional but accessible language
-- Highlight both strengths and concerns
-- Provide context for the risk tier
-- Do NOT include the numerical score (already shown separately)
-"""
+        # Nothing to weigh up, the template covers a clean low-risk result
+        if RISK_EXPLANATION_FAST_PATH and risk_result["risk_tier"] == "Low" and all(
+            factor["impact"] != "negative" for factor in risk_result["risk_factors"]
+        ):
+            return self._generate_fallback_explanation(risk_result)
         
         user_prompt = f"""
 Explain this tenant risk assessment:
@@ -368,7 +381,7 @@ Risk Score: {risk_result['risk_score']} / 1000
 Risk Tier: {risk_result['risk_tier']}
 
 Applicant Profile:
-{json.dumps(profile, indent=2)}
+{json.dumps(profile, separators=(",", ":"))}
 
 Credit Data:
 Credit Score: {credit_data.get('credit_score', 'N/A')}
@@ -379,13 +392,13 @@ Fraud Score: {fraud_data.get('fraud_score', 'N/A')}
 Fraud Indicators: {fraud_data.get('fraud_indicators', [])}
 
 Risk Factors:
-{json.dumps(risk_result['risk_factors'], indent=2)}
+{json.dumps(risk_result['risk_factors'], separators=(",", ":"))}
 
 Provide a clear explanation of this risk assessment.
 """
         
         explanation = await self.call_claude(
-            system_prompt=system_prompt,
+            system_prompt=self._SYSTEM_PROMPT,
             user_prompt=user_prompt
         )
         
@@ -454,6 +467,7 @@ Provide a clear explanation of this risk assessment.
 
 
 # Export agent
+@lru_cache(maxsize=1)
 def get_risk_agent() -> RiskAIAgent:
     """Get singleton instance of RiskAIAgent."""
     return RiskAIAgent()
@@ -9,6 +9,7 @@ are automatically picked up and processed as they arrive.
 """
 
 import asyncio
+import json
 import logging
 import signal
 import sys
@@ -240,7 +241,6 @@ class ApplicationProcessor:
         
         # Parse application data
         if app.get('application_data'):
-            import json
             if isinstance(app['application_data'], str):
                 application_data = json.loads(app['application_data'])
             else:
@@ -6,6 +6,7 @@ managing dependencies and parallel execution.
 """
 
 import asyncio
+import time
 import uuid
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -13,6 +14,7 @@ import logging
 
 from .context_manager import ContextManager
 from agents import (
+    BaseAgent,
     get_ingestion_agent,
     get_identity_agent,
     get_fraud_detection_agent,
@@ -83,6 +85,11 @@ class AgentOrchestrator:
         await asyncio.gather(*self.active_screenings.values(), return_exceptions=True)
         self.active_screenings.clear()
         
+        # Persist any buffered audit entries
+        audit_agent = self.agents.get("audit")
+        if audit_agent:
+            await audit_agent.flush()
+        
         logger.info("Agent orchestrator stopped")
     
     async def start_screening(self, application_data: Dict[str, Any]) -> str:
@@ -91,7 +98,7 @@ class AgentOrchestrator:
         
         Args:
             application_data: Raw application data
-            
+        
         Returns:
             Screening ID
         """
@@ -113,11 +120,11 @@ class AgentOrchestrator:
         
         Args:
             screening_id: Screening identifier
-            
+        
         Returns:
             Final screening result
         """
-        start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         
         try:
             await self.context_manager.update_status(screening_id, "processing")
@@ -133,7 +140,7 @@ class AgentOrchestrator:
             
             # Calculate total time
             end_time = datetime.utcnow()
-            processing_time_ms = int((end_time - start_time).total_seconds() * 1000)
+            processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
             final_result = {
                 "screening_id": screening_id,
@@ -147,7 +154,7 @@ class AgentOrchestrator:
             
             logger.info(f"Completed screening {screening_id} in {processing_time_ms}ms")
             return final_result
-            
+        
         except Exception as e:
             logger.error(f"Screening {screening_id} failed: {e}", exc_info=True)
             await self.context_manager.update_status(screening_id, "failed")
@@ -190,7 +197,7 @@ class AgentOrchestrator:
             )
             
             logger.info(f"Agent {agent_name} completed successfully")
-            
+        
         except Exception as e:
             logger.error(f"Agent {agent_name} failed: {e}", exc_info=True)
             
@@ -206,6 +213,45 @@ class AgentOrchestrator:
             
             raise
     
+    async def _run_agent_graph(self, context: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run all registered agents over one screening context.
+        
+        Each agent gets a task that waits only for its own dependencies,
+        so independent branches of the dependency graph overlap and the
+        screening takes as long as its critical path. Each result is
+        stored in the context as "<agent>_result" when the agent finishes.
+        
+        Args:
+            context: Screening context (shared by all agents)
+        
+        Returns:
+            Result envelope per agent name
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        async def run(agent_name: str) -> Dict[str, Any]:
+            dependencies = self.agent_dependencies.get(agent_name, [])
+            if dependencies:
+                await asyncio.wait([tasks[dep] for dep in dependencies])
+            # execute_many turns an escaped exception into an error envelope
+            result, = await BaseAgent.execute_many([self.agents[agent_name]], context)
+            context[f"{agent_name}_result"] = result
+            return result
+        
+        # Topological order, so dependency tasks exist before their dependents
+        for agent_name in self._determine_execution_order():
+            tasks[agent_name] = asyncio.create_task(run(agent_name))
+        
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        
+        return {agent_name: task.result() for agent_name, task in tasks.items()}
+    
     def _determine_execution_order(self) -> List[str]:
         """
         Determine agent execution order based on dependencies.
@@ -259,7 +305,7 @@ class AgentOrchestrator:
         Args:
             screening_id: Screening identifier
             timeout: Optional timeout in seconds
-            
+        
         Returns:
             Final screening result
         """
@@ -329,6 +375,7 @@ class AgentOrchestrator:
             Complete screening results
         """
         start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         
         try:
             logger.info(f"Starting screening for application {application_id}")
@@ -338,56 +385,12 @@ class AgentOrchestrator:
             if not context:
                 raise ValueError(f"Application {application_id} not found")
             
-            # Phase 1: Ingestion & Identity (parallel)
-            ingestion_agent = self.agents["ingestion"]
-            identity_agent = self.agents["identity"]
-            
-            ingestion_result, identity_result = await asyncio.gather(
-                ingestion_agent.execute(context),
-                identity_agent.execute(context)
-            )
-            
-            # Store results in context
-            context["ingestion_result"] = ingestion_result
-            context["identity_result"] = identity_result
-            
-            # Phase 2: Fraud & Risk (parallel)
-            fraud_agent = self.agents["fraud"]
-            risk_agent = self.agents["risk"]
-            
-            fraud_result, risk_result = await asyncio.gather(
-                fraud_agent.execute(context),
-                risk_agent.execute(context)
-            )
-            
-            context["fraud_result"] = fraud_result
-            context["risk_result"] = risk_result
-            
-            # Phase 3: Decision
-            decision_agent = self.agents["decision"]
-            decision_result = await decision_agent.execute(context)
-            context["decision_result"] = decision_result
-            
-            # Phase 4: Compliance & Bias (parallel)
-            compliance_agent = self.agents["compliance"]
-            bias_agent = self.agents["bias"]
-            
-            compliance_result, bias_result = await asyncio.gather(
-                compliance_agent.execute(context),
-                bias_agent.execute(context)
-            )
-            
-            context["compliance_result"] = compliance_result
-            context["bias_result"] = bias_result
-            
-            # Phase 5: Audit
-            audit_agent = self.agents["audit"]
-            audit_result = await audit_agent.execute(context)
-            context["audit_result"] = audit_result
+            # Run every agent as soon as its own dependencies are done
+            results = await self._run_agent_graph(context)
             
             # Build final result
             end_time = datetime.utcnow()
-            processing_time_ms = int((end_time - start_time).total_seconds() * 1000)
+            processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
             final_result = {
                 "application_id": application_id,
@@ -395,23 +398,20 @@ class AgentOrchestrator:
                 "started_at": start_time,
                 "completed_at": end_time,
                 "agent_results": [
-                    ingestion_result,
-                    identity_result,
-                    fraud_result,
-                    risk_result,
-                    decision_result,
-                    compliance_result,
-                    bias_result,
-                    audit_result
+                    results[agent_name]
+                    for agent_name in (
+                        "ingestion", "identity", "fraud", "risk",
+                        "decision", "compliance", "bias", "audit"
+                    )
                 ],
-                "final_decision": decision_result.get("data", {}),
+                "final_decision": results["decision"].get("data", {}),
                 "processing_time_ms": processing_time_ms
             }
             
             logger.info(f"Screening completed for {application_id} in {processing_time_ms}ms")
             
             return final_result
-            
+        
         except Exception as e:
             logger.error(f"Screening failed for {application_id}: {str(e)}", exc_info=True)
             raise
@@ -10,9 +10,30 @@ import aiomysql
 import json
 from urllib.parse import urlparse, unquote
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
 
+def _dumps(obj: Any) -> str:
+    """Serialize a JSON column value (orjson when available)."""
+    if HAS_ORJSON:
+        # MySQL JSON columns reject binary strings, so hand over str
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+
+def _loads(data: Any) -> Any:
+    """Parse a JSON column value (orjson when available)."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class DatabaseTool:
     """
     Database access tool for MCP agents.
@@ -123,7 +144,7 @@ class DatabaseTool:
             async with conn.cursor() as cursor:
                 await cursor.execute(
                     query,
-                    (json.dumps(application_data), "PENDING")
+                    (_dumps(application_data), "PENDING")
                 )
                 app_id = cursor.lastrowid
                 await conn.commit()
@@ -173,7 +194,7 @@ class DatabaseTool:
                         agent_name,
                         agent_type,
                         result_status,
-                        json.dumps(result_data),
+                        _dumps(result_data),
                         execution_time_ms,
                         confidence_score
                     )
@@ -216,9 +237,9 @@ class DatabaseTool:
         if row:
             # Parse JSON fields
             if row.get('application_data'):
-                row['application_data'] = json.loads(row['application_data'])
+                row['application_data'] = _loads(row['application_data'])
             if row.get('final_decision'):
-                row['final_decision'] = json.loads(row['final_decision'])
+                row['final_decision'] = _loads(row['final_decision'])
             return row
         return None
     
@@ -255,7 +276,7 @@ class DatabaseTool:
         # Parse JSON fields
         for row in rows:
             if row.get('result_data'):
-                row['result_data'] = json.loads(row['result_data'])
+                row['result_data'] = _loads(row['result_data'])
         
         return rows
     
@@ -302,7 +323,7 @@ class DatabaseTool:
                     (
                         status,
                         screening_completed,
-                        json.dumps(final_decision) if final_decision else None,
+                        _dumps(final_decision) if final_decision else None,
                         decision_reason,
                         risk_score,
                         application_id
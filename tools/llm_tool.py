@@ -72,7 +72,7 @@ class LLMTool:
             logger.warning("Claude client not available, using mock response")
             return self._mock_response(user_prompt)
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             response = await self.client.messages.create(
@@ -99,7 +99,7 @@ class LLMTool:
             cost = (input_tokens / 1_000_000 * 3) + (output_tokens / 1_000_000 * 15)
             self.total_cost += cost
             
-            elapsed = (time.time() - start_time) * 1000
+            elapsed = (time.perf_counter_ns() - start_ns) / 1_000_000
             
             logger.info(
                 f"Claude call: {elapsed:.0f}ms, "